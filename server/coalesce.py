@@ -0,0 +1,90 @@
+# COALESCE_V1 — batches provider deltas into fewer WebSocket frames.
+# The first delta is sent at once (time-to-first-token is untouched); after that text is held
+# until it reaches max_chars or the oldest held delta is window_ms old, whichever comes first.
+# Each connection carries its own FlushPolicy (query params or a "stream_config" frame).
+import asyncio, os
+from typing import AsyncIterator, Dict, Mapping, Optional
+
+COALESCE_MS    = float(os.getenv("WS_COALESCE_MS", "40"))
+COALESCE_CHARS = int(os.getenv("WS_COALESCE_CHARS", "256"))
+
+class FlushPolicy:
+    __slots__ = ("window_ms", "max_chars", "first_immediate")
+
+    def __init__(self, window_ms: float = COALESCE_MS, max_chars: int = COALESCE_CHARS,
+                 first_immediate: bool = True):
+        self.window_ms = min(max(0.0, float(window_ms)), 1000.0)
+        self.max_chars = min(max(1, int(max_chars)), 65536)
+        self.first_immediate = bool(first_immediate)
+
+    @property
+    def passthrough(self) -> bool:
+        """window 0 or max_chars 1: every delta is its own frame, as before."""
+        return self.window_ms <= 0 or self.max_chars <= 1
+
+    @classmethod
+    def from_params(cls, params: Mapping, base: Optional["FlushPolicy"] = None) -> "FlushPolicy":
+        """coalesce_ms / coalesce_chars / coalesce_first from a query string or a config frame;
+        missing or malformed values keep `base` (or the env defaults)."""
+        base = base or cls()
+        def pick(key, conv, default):
+            try: return conv(params[key]) if key in params else default
+            except (TypeError, ValueError): return default
+        first = pick("coalesce_first", lambda v: str(v).lower() not in ("0", "false", "no"), base.first_immediate)
+        return cls(pick("coalesce_ms", float, base.window_ms), pick("coalesce_chars", int, base.max_chars), first)
+
+    def as_dict(self) -> Dict:
+        return {"coalesce_ms": self.window_ms, "coalesce_chars": self.max_chars, "coalesce_first": self.first_immediate}
+
+_END = object()
+
+async def coalesce(source: AsyncIterator[str], policy: FlushPolicy,
+                   stats: Optional[Dict[str, int]] = None) -> AsyncIterator[str]:
+    """Frames from `source` per `policy`; stats (if given) gets "chunks" and "frames" counts.
+    A source error is raised after the text already received has been yielded."""
+    stats = stats if stats is not None else {}
+    stats.setdefault("chunks", 0); stats.setdefault("frames", 0)
+    if policy.passthrough:
+        async for chunk in source:
+            stats["chunks"] += 1; stats["frames"] += 1
+            yield chunk
+        return
+
+    # a pump task feeds a queue, so waiting out the window never cancels the provider stream itself
+    q: asyncio.Queue = asyncio.Queue()
+    async def pump() -> None:
+        try:
+            async for chunk in source: q.put_nowait(chunk)
+            q.put_nowait(_END)
+        except Exception as e:
+            q.put_nowait(e)
+    task = asyncio.create_task(pump())
+    loop = asyncio.get_running_loop()
+    window = policy.window_ms / 1000.0
+    buf, size, first, deadline = [], 0, policy.first_immediate, None
+    try:
+        while True:
+            try:
+                timeout = None if deadline is None else max(0.0, deadline - loop.time())
+                item = await asyncio.wait_for(q.get(), timeout)
+            except asyncio.TimeoutError:
+                item = None  # window elapsed: flush what is held
+            if item is None or item is _END or isinstance(item, Exception):
+                if buf:
+                    stats["frames"] += 1
+                    yield "".join(buf)
+                buf, size, deadline = [], 0, None
+                if item is _END: return
+                if item is not None: raise item
+                continue
+            if not item: continue
+            stats["chunks"] += 1
+            buf.append(item); size += len(item)
+            if first or size >= policy.max_chars:
+                stats["frames"] += 1
+                yield "".join(buf)
+                buf, size, deadline, first = [], 0, None, False
+            elif deadline is None:
+                deadline = loop.time() + window
+    finally:
+        task.cancel()
@@ -0,0 +1,98 @@
+# FAKE_LLM_V1 — local stand-in for AsyncOpenAI (LLM_BACKEND=fake) for offline load/latency runs.
+# Same call shape as client.chat.completions.create(...); streams tokens at LLM_FAKE_TPS after
+# LLM_FAKE_FIRST_MS (± LLM_FAKE_JITTER), answers foundation / summarizer / autolearn prompts with
+# canned JSON, and injects errors or hangs at LLM_FAKE_ERROR_RATE / LLM_FAKE_TIMEOUT_RATE.
+# Output and timing are seeded from the prompt, so the same request behaves the same every run.
+import asyncio, hashlib, json, os, random, re
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List
+
+def _env(name: str, default: str) -> float:
+    return float(os.getenv(name, default))
+
+class FakeLLMError(RuntimeError):
+    """Injected provider failure (stands in for a 5xx from the API)."""
+
+class FakeConfig:
+    def __init__(self):
+        self.tps          = _env("LLM_FAKE_TPS", "40")           # streamed tokens per second
+        self.first_ms     = _env("LLM_FAKE_FIRST_MS", "350")     # time to first token
+        self.jitter       = _env("LLM_FAKE_JITTER", "0.2")       # ± fraction on every delay
+        self.tokens       = int(_env("LLM_FAKE_TOKENS", "60"))   # length of a chat reply
+        self.error_rate   = _env("LLM_FAKE_ERROR_RATE", "0")
+        self.timeout_rate = _env("LLM_FAKE_TIMEOUT_RATE", "0")
+        self.hang_s       = _env("LLM_FAKE_HANG_S", "30")        # how long an injected timeout hangs
+        self.seed         = os.getenv("LLM_FAKE_SEED", "0")
+
+_WORDS = ("the next guess should split the remaining candidates so each mark pattern leaves few words "
+          "try letters you have not seen yet and keep greens fixed while moving yellows").split()
+
+def _kind(messages: List[Dict]) -> str:
+    system = " ".join(m.get("content", "") for m in messages if m.get("role") == "system")
+    if "Peggy-Foundation" in system: return "foundation"
+    if "Peggy-Learn" in system: return "autolearn"
+    if "condense chat into durable memory" in system: return "summarizer"
+    return "chat"
+
+def _canned(kind: str, messages: List[Dict], rng: random.Random, n_tokens: int) -> str:
+    last = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    if kind == "foundation":
+        return json.dumps({"reply": "noted", "evidence": {},
+                           "patch": [{"op": "replace", "path": "/state/next_action",
+                                      "value": "probe: " + " ".join(re.findall(r"\w+", last)[-3:])}]})
+    if kind == "summarizer":
+        return json.dumps({"facts": [], "summary": "User and assistant worked through the current puzzle."})
+    if kind == "autolearn":
+        return json.dumps({"weights": {"info_gain": 0.8, "heuristics": 0.2},
+                           "rules": [{"id": "avoid_duplicates_early", "weight": 1.0},
+                                     {"id": "prefer_common_letters", "weight": 1.0},
+                                     {"id": "prefer_two_vowels_early", "weight": 0.6}]})
+    return " ".join(rng.choice(_WORDS) for _ in range(n_tokens)) + "."
+
+def _tokens(text: str) -> List[str]:
+    return re.findall(r"\S+\s*|\s+", text)  # word-sized pieces, like streamed deltas
+
+class _Completions:
+    def __init__(self, cfg: FakeConfig):
+        self.cfg = cfg
+
+    def _delay(self, rng: random.Random, seconds: float) -> float:
+        return max(0.0, seconds * (1 + rng.uniform(-self.cfg.jitter, self.cfg.jitter)))
+
+    async def create(self, model: str = "", messages: List[Dict] = (), stream: bool = False,
+                     max_tokens: int = 0, **_: Any):
+        cfg, messages = self.cfg, list(messages)
+        seed = hashlib.sha1(json.dumps([cfg.seed, model, messages], sort_keys=True, default=str).encode()).hexdigest()
+        rng = random.Random(seed)
+        roll = rng.random()
+        if roll < cfg.timeout_rate:
+            await asyncio.sleep(cfg.hang_s)  # the caller's timeout is meant to fire first
+            raise asyncio.TimeoutError("fake LLM hang")
+        if roll < cfg.timeout_rate + cfg.error_rate:
+            await asyncio.sleep(self._delay(rng, cfg.first_ms / 1000))
+            raise FakeLLMError("fake LLM injected error")
+        kind = _kind(messages)
+        n = min(cfg.tokens, max_tokens) if max_tokens else cfg.tokens
+        pieces = _tokens(_canned(kind, messages, rng, n))
+        per_token = 1.0 / cfg.tps if cfg.tps > 0 else 0.0
+        if stream:
+            return self._stream(pieces, rng, per_token, model)
+        await asyncio.sleep(self._delay(rng, cfg.first_ms / 1000 + per_token * len(pieces)))
+        msg = SimpleNamespace(role="assistant", content="".join(pieces))
+        return SimpleNamespace(model=model, choices=[SimpleNamespace(index=0, message=msg, finish_reason="stop")])
+
+    async def _stream(self, pieces: List[str], rng: random.Random, per_token: float, model: str) -> AsyncIterator:
+        await asyncio.sleep(self._delay(rng, self.cfg.first_ms / 1000))
+        for i, p in enumerate(pieces):
+            if i: await asyncio.sleep(self._delay(rng, per_token))
+            delta = SimpleNamespace(role="assistant" if i == 0 else None, content=p)
+            yield SimpleNamespace(model=model, choices=[SimpleNamespace(index=0, delta=delta, finish_reason=None)])
+
+class FakeAsyncClient:
+    """Drop-in for the parts of AsyncOpenAI this server uses."""
+    def __init__(self, cfg: FakeConfig = None):
+        self.config = cfg or FakeConfig()
+        self.chat = SimpleNamespace(completions=_Completions(self.config))
+
+    async def close(self) -> None:
+        pass
@@ -1,15 +1,22 @@
 # server/foundation/autolearn.py
-import os, json, re
+# Heuristics generation per project. Responses are cached by hash(model, prompt, params) — the prompt
+# names the project — in memory and under foundation/autolearn_cache/ (AUTOLEARN_CACHE_TTL_S, a
+# week by default; a learn request with "refresh" bypasses it), and run_batch()
+# learns many projects concurrently under a concurrency cap plus a start-rate limit, reporting
+# progress through a callback. A cached answer keeps the timestamp of its original generation.
+import asyncio, os, json, re, time
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
 from datetime import datetime, timezone
 
-try:
-    from openai import AsyncOpenAI
-except Exception:
-    AsyncOpenAI = None
+from ..llm_provider import get_client, complete
+from ..llm_cache import ResponseCache, cache_key
 
 ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = ROOT / "foundation" / "autolearn_cache"
+AUTOLEARN_CONCURRENCY = int(os.getenv("AUTOLEARN_CONCURRENCY", "4"))
+AUTOLEARN_RATE = float(os.getenv("AUTOLEARN_RATE", "2"))  # generations started per second
+AUTOLEARN_CACHE_TTL_S = float(os.getenv("AUTOLEARN_CACHE_TTL_S", str(7 * 24 * 3600)))  # 0 keeps forever
 def _now(): return datetime.now(timezone.utc).isoformat()
 
 def _ensure_dir(path: Path): path.mkdir(parents=True, exist_ok=True)
@@ -22,47 +29,108 @@ def _unwrap_json(s: str) -> Dict:
         s = m.group(1)
     return json.loads(s)
 
-async def run_autolearn(project_id: str, sb: Dict) -> Dict[str, Any]:
-    out = {"project": project_id, "applied": False, "files": [], "error": None, "notes": []}
+SYSTEM = (
+    "You are Peggy-Learn. Output a compact JSON object of heuristics ONLY.\n"
+    'Schema:\n{"weights":{"info_gain":0.8,"heuristics":0.2},'
+    '"rules":[{"id":"avoid_duplicates_early","weight":1.0},'
+    '{"id":"prefer_common_letters","weight":1.0},'
+    '{"id":"prefer_two_vowels_early","weight":0.6}]}\n'
+    "No prose, no explanations—JSON only."
+)
 
-    api_key = os.getenv("OPENAI_API_KEY", "").strip()
-    if not api_key or AsyncOpenAI is None:
-        out["error"] = "no_api_or_lib"; return out
+def _model() -> str:
+    return os.getenv("OPENAI_MODEL","gpt-4o-mini")
 
-    client = AsyncOpenAI(api_key=api_key)
+def _messages(project_id: str) -> List[Dict]:
+    return [{"role":"system","content":SYSTEM},
+            {"role":"user","content":f"Project={project_id}. Provide heuristics JSON now."}]
 
-    system = (
-        "You are Peggy-Learn. Output a compact JSON object of heuristics ONLY.\n"
-        'Schema:\n{"weights":{"info_gain":0.8,"heuristics":0.2},'
-        '"rules":[{"id":"avoid_duplicates_early","weight":1.0},'
-        '{"id":"prefer_common_letters","weight":1.0},'
-        '{"id":"prefer_two_vowels_early","weight":0.6}]}\n'
-        "No prose, no explanations—JSON only."
-    )
-    user = f"Project={project_id}. Provide heuristics JSON now."
+PARAMS = {"temperature": 0.1, "max_tokens": 400, "response_format": {"type": "json_object"}}  # <-- force JSON
+LEARNED = ResponseCache(ttl_s=AUTOLEARN_CACHE_TTL_S, disk_dir=CACHE_DIR)
 
+class RateLimiter:
+    """Spaces acquisitions at least 1/rate seconds apart (rate <= 0 disables it)."""
+    def __init__(self, rate: float = AUTOLEARN_RATE):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval: return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0: await asyncio.sleep(delay)
+
+async def run_autolearn(project_id: str, sb: Dict, client=None, limiter: Optional[RateLimiter] = None,
+                        use_cache: bool = True) -> Dict[str, Any]:
+    out = {"project": project_id, "applied": False, "files": [], "error": None, "notes": [], "cached": False}
+
+    model, messages = _model(), _messages(project_id)
+    key = cache_key(model, messages, PARAMS)
+    hit = LEARNED.get_entry(key) if use_cache else None
     try:
-        resp = await client.chat.completions.create(
-            model=os.getenv("OPENAI_MODEL","gpt-4o-mini"),
-            messages=[{"role":"system","content":system},{"role":"user","content":user}],
-            temperature=0.1,
-            max_tokens=400,
-            response_format={"type":"json_object"}  # <-- force JSON
-        )
-        raw = (resp.choices[0].message.content or "").strip()
-        data = _unwrap_json(raw)  # tolerate code fences if any
+        if hit is not None:
+            out["cached"] = True
+            stored_at, raw = hit
+            generated = datetime.fromtimestamp(stored_at, timezone.utc).isoformat()
+            data = _unwrap_json(raw)
+        else:
+            client = client or get_client()
+            if client is None:
+                out["error"] = "no_api_or_lib"; return out
+            if limiter: await limiter.wait()
+            raw, _ = await complete(messages, model=model, client=client, **PARAMS)
+            generated = _now()
+            data = _unwrap_json(raw)  # tolerate code fences if any
+            LEARNED.put(key, raw)     # only answers that parsed are kept
     except Exception as e:
         out["error"] = f"gen_fail: {type(e).__name__}: {e}"
         return out
+    data["meta"] = {"generated": generated, "model": model, "cached": out["cached"]}
 
     # store under modules/<project>/studies to keep it data-only (no code)
     mod_dir = ROOT / "modules" / project_id / "studies"
     _ensure_dir(mod_dir)
     heuristics_path = mod_dir / "heuristics.json"
-    data["meta"] = {"generated": _now(), "model": os.getenv("OPENAI_MODEL","gpt-4o-mini")}
     heuristics_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
 
     out["applied"] = True
     out["files"].append(str(heuristics_path.relative_to(ROOT)))
     out["notes"].append("heuristics.json written; suggester will blend info_gain + heuristics")
     return out
+
+Progress = Callable[[Dict], Awaitable[None]]
+
+async def run_batch(projects: List[str], sb: Dict, on_progress: Optional[Progress] = None,
+                    concurrency: int = AUTOLEARN_CONCURRENCY, rate: float = AUTOLEARN_RATE,
+                    refresh: Iterable[str] = ()) -> List[Dict[str, Any]]:
+    """run_autolearn for each distinct project, at most `concurrency` in flight and generations
+    started no faster than `rate`/s; on_progress gets a learn_progress frame per start and finish.
+    Projects in `refresh` skip the cache and are generated anew."""
+    refresh = set(refresh)
+    projects = list(dict.fromkeys(p for p in projects if p))
+    total, done = len(projects), 0
+    client, limiter, gate = get_client(), RateLimiter(rate), asyncio.Semaphore(max(1, concurrency))
+
+    async def report(frame: Dict) -> None:
+        if on_progress is None: return
+        try: await on_progress({"type":"learn_progress", "total": total, **frame})
+        except Exception: pass  # a closed socket must not fail the batch
+
+    async def one(pid: str) -> Dict[str, Any]:
+        nonlocal done
+        async with gate:
+            await report({"project": pid, "status": "started", "done": done})
+            try:
+                res = await run_autolearn(pid, sb, client=client, limiter=limiter, use_cache=pid not in refresh)
+            except Exception as e:
+                res = {"project": pid, "applied": False, "files": [], "error": f"{type(e).__name__}: {e}",
+                       "notes": [], "cached": False}
+            done += 1
+            await report({"project": pid, "status": "error" if res.get("error") else "done", "done": done,
+                          "cached": res.get("cached", False)})
+            return res
+
+    return list(await asyncio.gather(*(one(p) for p in projects)))
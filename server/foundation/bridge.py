@@ -1,26 +1,23 @@
 # Minimal foundation bridge: no esoteric imports; optional measure_fn for proof-gated edits
-import os, json
+import copy, os, json
 from pathlib import Path
 from typing import Dict, Any, Optional, Callable
 from datetime import datetime, timezone
 
 from .patch_guard import apply_with_evidence, PatchError
 from .prompt_patch import assemble_patch_prompt
-
-try:
-    from openai import AsyncOpenAI
-except Exception:
-    AsyncOpenAI = None
+from . import relevance
+from .store import ShardedStatebooks, register, flush_all
+from ..llm_provider import get_client, complete, parses_as_json
+from ..llm_cache import RESPONSES
 
 ROOT   = Path(__file__).resolve().parents[1]  # .../server
-SB_PATH = ROOT / "foundation" / "statebook.json"
+SB_PATH = ROOT / "foundation" / "statebook.json"          # session "default"
+SB_DIR  = ROOT / "foundation" / "statebooks"              # one shard per other session_id
 
 def _now() -> str: return datetime.now(timezone.utc).isoformat()
 
-def load_statebook() -> Dict:
-    if SB_PATH.exists():
-        try: return json.loads(SB_PATH.read_text(encoding="utf-8"))
-        except Exception: pass
+def _default_statebook() -> Dict:
     return {
         "kernel":{"policy":{"allowed_paths":["/state/*","/temp/*","/connections/*","/gaps/*","/logs/decisions/*"],
                             "thresholds":{"grs":0.80}, "kernel_locked":True}},
@@ -29,31 +26,53 @@ def load_statebook() -> Dict:
         "connections":{"motifs":[]}
     }
 
-def save_statebook(sb: Dict) -> None:
-    SB_PATH.parent.mkdir(parents=True, exist_ok=True)
+def _seed_statebook(base: Optional[Dict]) -> Dict:
+    """New session shard: kernel/principles/connections from the default statebook, fresh project/state."""
+    sb = _default_statebook()
+    if base:
+        for k, v in base.items():
+            if k not in ("project", "state", "meta"): sb[k] = copy.deepcopy(v)
+    return sb
+
+_SHARDS = register(ShardedStatebooks(SB_DIR, SB_PATH, _seed_statebook))
+
+def load_statebook(session_id: str = "default") -> Dict:
+    """In-memory statebook of this session (its shard is read from disk once while resident)."""
+    return _SHARDS.load(session_id)
+
+def save_statebook(sb: Dict, session_id: str = "default") -> None:
+    """Mark dirty; written to disk within STATEBOOK_FLUSH_MS (and on eviction/shutdown)."""
     sb.setdefault("meta", {})["updated"] = _now()
-    SB_PATH.write_text(json.dumps(sb, ensure_ascii=False, indent=2), encoding="utf-8")
+    _SHARDS.save(sb, session_id)
+
+def flush_statebook() -> None:
+    flush_all()
 
 async def propose_and_apply_patch(user_text: str, assistant_reply: str,
-                                  measure_fn: Optional[Callable[[Dict], Dict[str,float]]] = None) -> Dict[str, Any]:
-    sb = load_statebook()
+                                  measure_fn: Optional[Callable[[Dict], Dict[str,float]]] = None,
+                                  session_id: str = "default") -> Dict[str, Any]:
+    sb = load_statebook(session_id)
     project_id = sb.get("project",{}).get("id","")
 
+    # local relevance gate: most turns cannot change the statebook, so no model call for them
+    run, reason = relevance.check(sb, session_id, user_text, assistant_reply)
+    if not run:
+        return {"applied": False, "error": None, "notes": [], "raw": None, "project_id": project_id, "skipped": reason}
+
     # tiny, token-lean prompt
     _, messages = assemble_patch_prompt(sb, project_id, last_user=user_text, last_assistant=assistant_reply)
 
     applied=False; error=None; notes=[]; raw=None
-    api_key = os.getenv("OPENAI_API_KEY","").strip()
+    client = get_client()
 
-    if not api_key or AsyncOpenAI is None:
-        save_statebook(sb)
-        return {"applied": applied, "error":"no_api_or_lib", "notes":notes, "raw":raw, "project_id":project_id}
+    if client is None:
+        save_statebook(sb, session_id)
+        relevance.remember(session_id, sb)
+        return {"applied": applied, "error":"no_api_or_lib", "notes":notes, "raw":raw, "project_id":project_id, "gate": reason}
 
     try:
-        client = AsyncOpenAI(api_key=api_key)
-        resp = await client.chat.completions.create(model=os.getenv("OPENAI_MODEL","gpt-4o-mini"),
-                                                    messages=messages, temperature=0.1, max_tokens=300)
-        raw = (resp.choices[0].message.content or "").strip()
+        raw, _ = await complete(messages, model=os.getenv("OPENAI_MODEL","gpt-4o-mini"), client=client,
+                                cache=RESPONSES, accept=parses_as_json, temperature=0.1, max_tokens=300)
         obj = json.loads(raw)
         patch = obj.get("patch", [])
         evidence = obj.get("evidence", {})
@@ -65,5 +84,6 @@ async def propose_and_apply_patch(user_text: str, assistant_reply: str,
     except Exception as e:
         error = f"{type(e).__name__}: {e}"
 
-    save_statebook(sb)
-    return {"applied": applied, "error": error, "notes": notes, "raw": raw, "project_id": project_id}
+    save_statebook(sb, session_id)
+    relevance.remember(session_id, sb)
+    return {"applied": applied, "error": error, "notes": notes, "raw": raw, "project_id": project_id, "gate": reason}
@@ -1,9 +1,14 @@
 # server/foundation/checkers/wordle_checkers.py
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Sequence
 from collections import Counter
 import os
 
+from ..modules.wordle import lexicon
+from ..modules.wordle.index import WordIndex
+from ..modules.wordle.lexicon import Lexicon
+from ..modules.wordle.predicate import compile_constraints
+
 # ---- dictionary discovery (first hit wins) ----
 def _candidate_paths() -> List[Path]:
     env = os.getenv("WORDLE_DICT_FILE", "").strip()
@@ -17,9 +22,9 @@ def _candidate_paths() -> List[Path]:
         Path(__file__).resolve().parent / "dictionary.txt",
     ]
 
-_DICT: List[str] = []
-_MTIME = None
+_DICT: Lexicon = lexicon.EMPTY
 _PATH: Path | None = None
+_INDEX: WordIndex | None = None
 
 def _resolve_path() -> Path | None:
     for p in _candidate_paths():
@@ -27,24 +32,19 @@ def _resolve_path() -> Path | None:
             return p
     return None
 
-def load_dictionary(path: str | None = None) -> List[str]:
-    """Load lowercased 5-letter words, hot‑reloading on file mtime changes."""
-    global _DICT, _MTIME, _PATH
-    p = Path(path) if path else _resolve_path()
+def load_dictionary(path: str | None = None) -> Lexicon:
+    """Shared read-only word list (mmapped snapshot), hot‑reloading when the text file changes."""
+    global _DICT, _PATH, _INDEX
+    p = Path(path) if path else (_PATH if _DICT else None) or _resolve_path()
     if not p:
-        _DICT, _MTIME, _PATH = [], None, None
-        return []
-    mtime = p.stat().st_mtime
-    if _MTIME != mtime or not _DICT:
-        words = []
-        for ln in p.read_text(encoding="utf-8").splitlines():
-            w = ln.strip().lower()
-            if len(w) == 5 and w.isalpha():
-                words.append(w)
-        _DICT, _MTIME, _PATH = words, mtime, p
-    return list(_DICT)
+        _DICT, _PATH, _INDEX = lexicon.EMPTY, None, None
+        return _DICT
+    lex = lexicon.load(p)
+    if lex is not _DICT or _INDEX is None:
+        _DICT, _PATH, _INDEX = lex, p, WordIndex(lex)
+    return _DICT
 
-def get_dict() -> List[str]:
+def get_dict() -> Lexicon:
     return load_dictionary()
 
 def dict_len() -> int:
@@ -72,9 +72,15 @@ def respects_constraints(word: str, constraints: Dict) -> bool:
         if w.count(ch) > cnt: return False
     return True
 
-def filter_candidates(constraints: Dict, dictionary: List[str] | None = None) -> List[str]:
-    dictionary = dictionary or get_dict()
-    return [w for w in dictionary if respects_constraints(w, constraints)]
+def get_index() -> WordIndex:
+    load_dictionary()
+    return _INDEX or WordIndex([])
+
+def filter_candidates(constraints: Dict, dictionary: Sequence[str] | None = None) -> List[str]:
+    """Bitset path for the loaded dictionary; per-word scan for any other list."""
+    if not dictionary or dictionary is _DICT or dictionary == get_dict():
+        return get_index().filter(constraints)
+    return compile_constraints(constraints).filter(dictionary)
 
 def info_gain_score(word: str, candidates: List[str]) -> float:
     if not candidates: return 0.0
@@ -87,3 +93,17 @@ def info_gain_score(word: str, candidates: List[str]) -> float:
             score += total/max(1,5*len(candidates))
             used.add(ch)
     return float(score)
+
+def info_gain_scores(candidates: List[str]) -> List[float]:
+    """info_gain_score for every candidate, sharing one set of position counts."""
+    if not candidates: return []
+    n = len(candidates)
+    pos_counts = [Counter([w[i] for w in candidates]) for i in range(5)]
+    totals = Counter()
+    for pc in pos_counts: totals.update(pc)
+    out = []
+    for w in candidates:
+        s = sum(pos_counts[i].get(ch,0) for i,ch in enumerate(w))/max(1,n)
+        s += sum(totals.get(ch,0) for ch in set(w))/max(1,5*n)
+        out.append(float(s))
+    return out
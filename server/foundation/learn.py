@@ -0,0 +1,119 @@
+from __future__ import annotations
+# Batch learn: GRS gate, study scaffolding, ledger update and cross-linking for many topics in one
+# process. The ledger is read once, de-duplicated through indexed sets and written once per batch.
+#   python server/foundation/learn.py chess go poker [--grs '{"ops_fit": 0.5}']
+import argparse, json, sys
+from pathlib import Path
+
+try:
+    from .grs import grs
+    from .store import atomic_write
+    from .xlinker import XLinkIndex, load_json, rule_ids, topic_rules
+except ImportError:  # run as a script
+    from grs import grs
+    from store import atomic_write
+    from xlinker import XLinkIndex, load_json, rule_ids, topic_rules
+
+FOUNDATION = Path(__file__).resolve().parent
+LEDGER_PATH = FOUNDATION / "ledger.json"
+MODULES_DIR = FOUNDATION.parent / "modules"
+PROJECT_ROOT = FOUNDATION.parents[1]
+TEMPLATES = MODULES_DIR / "_templates" / "studies"
+GRS_DEFAULTS = {"prereqs_ok": 1, "resources_ok": 1, "risk_inverse": 1, "context_freshness": 1, "ops_fit": 1}
+
+def first_question(topic: str) -> str:
+    return f"What fast probe would validate first rule for '{topic}'?"
+
+class Ledger:
+    """ledger.json in memory; list sections are mirrored by sets so appends skip duplicates."""
+
+    def __init__(self, path: Path = LEDGER_PATH):
+        self.path = path
+        self.doc = load_json(path) if path.exists() else {"version": 1}
+        self.doc.setdefault("skills", {})
+        self._questions = set()
+        self.doc["open_questions"] = [q for q in self.doc.get("open_questions", []) if self._add_seen(self._questions, q)]
+        self._heuristics = set()
+        self.doc["proven_heuristics"] = [h for h in self.doc.get("proven_heuristics", [])
+                                         if self._add_seen(self._heuristics, json.dumps(h, sort_keys=True))]
+        self.xlinks = XLinkIndex()
+        self.doc["xlinks"] = [x for x in self.doc.get("xlinks", []) if self._add_seen(self.xlinks.pairs, (x["a"], x["b"]))]
+
+    @staticmethod
+    def _add_seen(seen: set, key) -> bool:
+        if key in seen: return False
+        seen.add(key)
+        return True
+
+    def bump_skill(self, topic: str) -> None:
+        self.doc["skills"][topic] = int(self.doc["skills"].get(topic, 0)) + 1
+
+    def ask(self, question: str) -> bool:
+        if not self._add_seen(self._questions, question): return False
+        self.doc["open_questions"].append(question)
+        return True
+
+    def link(self, topic: str, ids) -> list:
+        added = self.xlinks.add_topic(topic, ids)
+        self.doc["xlinks"].extend(added)
+        return added
+
+    def save(self) -> None:
+        atomic_write(self.path, json.dumps(self.doc, ensure_ascii=False, indent=2))
+
+def _rel(path: Path) -> str:
+    """Path as reported in packets: relative to the project root, like the old learn.ps1 output."""
+    try: return path.resolve().relative_to(PROJECT_ROOT).as_posix()
+    except ValueError: return str(path)  # a modules_dir outside the project
+
+def scaffold(topic: str, modules_dir: Path = MODULES_DIR) -> list:
+    """Create modules/<topic>/studies from the templates; returns the files written (project-relative)."""
+    studies = modules_dir / topic / "studies"
+    studies.mkdir(parents=True, exist_ok=True)
+    h, n = studies / "heuristics.json", studies / "notes.md"
+    files = []
+    if not h.exists():
+        h.write_text((TEMPLATES / "heuristics.json").read_text(encoding="utf-8-sig")
+                     .replace('"<replace-me>"', json.dumps(topic)), encoding="utf-8")
+        files.append(_rel(h))
+    if not n.exists():
+        n.write_text((TEMPLATES / "notes.md").read_text(encoding="utf-8-sig"), encoding="utf-8")
+        files.append(_rel(n))
+    return files
+
+def learn_batch(topics, grs_payload: dict = None, ledger_path: Path = LEDGER_PATH,
+                modules_dir: Path = MODULES_DIR) -> list:
+    """Packets for a batch: one learn/blocked per topic, then a single xlinks packet."""
+    gate = grs({**GRS_DEFAULTS, **(grs_payload or {})})
+    if not gate["pass"]:
+        return [{"type": "blocked", "project": t, "grs": gate["grs"], "reasons": gate["reasons"]} for t in topics]
+    ledger = Ledger(ledger_path)
+    # index what is already on disk once; each learned topic then only adds its own links
+    known = topic_rules(str(modules_dir))
+    for t, ids in sorted(known.items()):
+        ledger.link(t, ids)
+    packets, links = [], []
+    for topic in dict.fromkeys(topics):
+        try:
+            files = scaffold(topic, modules_dir)
+            ledger.bump_skill(topic)
+            ledger.ask(first_question(topic))
+            links += ledger.link(topic, rule_ids(load_json(modules_dir / topic / "studies" / "heuristics.json")))
+            packets.append({"type": "learn", "project": topic, "applied": True, "files": files, "error": None})
+        except Exception as e:
+            packets.append({"type": "learn", "project": topic, "applied": False, "files": [], "error": str(e)})
+    ledger.save()
+    packets.append({"type": "xlinks", "added": len(links), "examples": links[:3]})
+    return packets
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Learn one or more topics in a single pass.")
+    ap.add_argument("topics", nargs="+")
+    ap.add_argument("--grs", default="", help="JSON object overriding the GRS gate inputs")
+    args = ap.parse_args(argv)
+    for p in learn_batch(args.topics, json.loads(args.grs) if args.grs else None):
+        print(json.dumps(p, ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+# Metrics registry for evidence checks. Modules register named metrics together with the
+# statebook sub-trees (JSON pointers) they read; values are memoized on a hash of exactly those
+# sub-trees, so re-measuring a statebook whose relevant parts did not change costs a hash.
+import hashlib, json
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from typing import Callable, Dict, Optional, Tuple
+
+MAX_CACHED = 1024
+
+class Metric:
+    __slots__ = ("name", "reads", "fn", "project", "salt")
+    def __init__(self, name: str, reads: Tuple[str, ...], fn: Callable[[Dict], float],
+                 project: Optional[str] = None, salt: Optional[Callable[[], str]] = None):
+        self.name, self.reads, self.fn, self.project, self.salt = name, tuple(reads), fn, project, salt
+
+_METRICS: Dict[str, Metric] = {}
+_CACHE: "OrderedDict[tuple, float]" = OrderedDict()
+STATS = {"hits": 0, "misses": 0}
+
+def register(name: str, reads: Tuple[str, ...], fn: Callable[[Dict], float],
+             project: Optional[str] = None, salt: Optional[Callable[[], str]] = None) -> None:
+    """fn(sb) -> float, reading only `reads`; `project` limits it to statebooks of that project id;
+    `salt()` names outside inputs (e.g. a dictionary digest) that also invalidate the value."""
+    _METRICS[name] = Metric(name, reads, fn, project, salt)
+
+def _at(sb, pointer: str):
+    node = sb
+    for t in (t for t in pointer.split("/") if t):
+        if isinstance(node, Mapping): node = node.get(t)
+        elif isinstance(node, Sequence) and not isinstance(node, str) and t.isdigit() and int(t) < len(node):
+            node = node[int(t)]
+        else: return None
+    return node
+
+def _plain(o):
+    if isinstance(o, Mapping): return dict(o)
+    if isinstance(o, Sequence): return list(o)
+    raise TypeError(type(o).__name__)
+
+def _key(m: Metric, sb) -> tuple:
+    body = json.dumps([_at(sb, p) for p in m.reads], sort_keys=True, separators=(",", ":"),
+                      ensure_ascii=False, default=_plain)  # default= unwraps read-only views
+    return (m.name, m.salt() if m.salt else "", hashlib.sha1(body.encode("utf-8")).hexdigest())
+
+def measure(sb) -> Dict[str, float]:
+    """Every registered metric that applies to `sb` (plain dict or read-only view)."""
+    pid = (_at(sb, "/project/id") or "")
+    out: Dict[str, float] = {}
+    for m in list(_METRICS.values()):
+        if m.project and m.project != pid: continue
+        k = _key(m, sb)
+        v = _CACHE.get(k)
+        if v is None:
+            STATS["misses"] += 1
+            v = _CACHE[k] = float(m.fn(sb))
+            while len(_CACHE) > MAX_CACHED: _CACHE.popitem(last=False)
+        else:
+            STATS["hits"] += 1
+            _CACHE.move_to_end(k)
+        out[m.name] = v
+    return out
@@ -0,0 +1,64 @@
+# server/foundation/modules/wordle/candidates.py
+# Per-game candidate cache. Constraints in a game only tighten, so each turn re-checks the
+# previous survivors instead of the whole dictionary; a loosened constraint set (user fixed a
+# mark) or a reset falls back to a full filter.
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from .checker import get_index
+from .index import WordIndex
+from .predicate import canonical, compile_constraints, digest as _digest
+
+MAX_GAMES = 256
+# re-check survivors one by one only while they are a small slice of the dictionary;
+# above that the bitset pass over the whole index is cheaper
+_SCAN_RATIO = 32
+
+def _tightens(old: Dict, new: Dict) -> bool:
+    """True when every word allowed by `new` is also allowed by `old`."""
+    if any(g and g != n for g, n in zip(old["greens"], new["greens"])): return False
+    if any(not set(o) <= set(n) for o, n in zip(old["yellows_not_here"], new["yellows_not_here"])): return False
+    if not set(old["must_include"]) <= set(new["must_include"]): return False
+    if not set(old["must_exclude"]) <= set(new["must_exclude"]): return False
+    if any(new["min_counts"].get(ch, 0) < v for ch, v in old["min_counts"].items()): return False
+    if any(ch not in new["max_counts"] or new["max_counts"][ch] > v for ch, v in old["max_counts"].items()): return False
+    return True
+
+class _Entry:
+    __slots__ = ("fp", "canon", "index", "words")
+    def __init__(self, fp: str, canon: Dict, index: WordIndex, words: List[str]):
+        self.fp, self.canon, self.index, self.words = fp, canon, index, words
+
+_GAMES: "OrderedDict[str, _Entry]" = OrderedDict()
+
+def new_game_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+def game_key(sb: Dict) -> str:
+    return str(sb.get("state", {}).get("_game", ""))
+
+def invalidate(sb: Dict) -> None:
+    _GAMES.pop(game_key(sb), None)
+
+def narrow(key: str, cons: Dict, index: WordIndex) -> List[str]:
+    canon = canonical(cons); fp = _digest(canon)
+    e = _GAMES.get(key)
+    if e is not None and e.index is index and e.fp == fp:
+        _GAMES.move_to_end(key)
+        return list(e.words)
+    if e is not None and e.index is index and len(e.words) * _SCAN_RATIO <= len(index) \
+            and _tightens(e.canon, canon):
+        words = compile_constraints(cons, canon, fp).filter(e.words)
+    else:
+        words = index.filter(cons)
+    _GAMES[key] = _Entry(fp, canon, index, words)
+    _GAMES.move_to_end(key)
+    while len(_GAMES) > MAX_GAMES:
+        _GAMES.popitem(last=False)
+    return list(words)
+
+def candidates_for(sb: Dict, index: Optional[WordIndex] = None) -> List[str]:
+    """Surviving words for the game in `sb` (cost proportional to last turn's survivors)."""
+    cons = sb.get("state", {}).get("constraints") or {}
+    return narrow(game_key(sb), cons, index or get_index())
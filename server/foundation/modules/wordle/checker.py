@@ -1,35 +1,38 @@
 import os, string
-from typing import Dict, List
+from typing import Dict, List, Sequence
 from pathlib import Path
 from collections import Counter
+from . import lexicon
+from .index import WordIndex
+from .lexicon import Lexicon
+from .predicate import compile_constraints
+from ...metrics import register as register_metric
 
 DICT_PATH = Path(__file__).resolve().parent / "dictionary.txt"
-_DICT: List[str] = []
-_MTIME = None
+_DICT: Lexicon = lexicon.EMPTY
+_INDEX: WordIndex | None = None
 
-def load_dictionary(path: str | None = None) -> List[str]:
-    """Reloads on file mtime change; keeps memory small."""
-    global _DICT, _MTIME
-    p = Path(path) if path else DICT_PATH
-    mtime = p.stat().st_mtime if p.exists() else None
-    if _MTIME != mtime or not _DICT:
-        words = []
-        if p.exists():
-            for line in p.read_text(encoding="utf-8").splitlines():
-                w = line.strip().lower()
-                if len(w)==5 and w.isalpha():
-                    words.append(w)
-        _DICT = words
-        _MTIME = mtime
-    return list(_DICT)
+def load_dictionary(path: str | None = None) -> Lexicon:
+    """Shared read-only word list (mmapped dictionary.bin); hot-reloads when the text file changes."""
+    global _DICT, _INDEX
+    p = Path(path) if path else Path(os.getenv("WORDLE_DICT_FILE", "").strip() or DICT_PATH).expanduser()
+    lex = lexicon.load(p)
+    if lex is not _DICT or _INDEX is None:
+        _DICT, _INDEX = lex, WordIndex(lex)
+    return _DICT
 
-def get_dict() -> List[str]:
+def get_dict() -> Lexicon:
     return load_dictionary()
 
-def valid_word(word: str, dictionary: List[str] | None = None) -> bool:
+def dict_len() -> int:
+    return len(load_dictionary())
+
+def valid_word(word: str, dictionary: Sequence[str] | None = None, constraints: Dict | None = None) -> bool:
+    """Dictionary word; in hard mode (constraints given) it must also respect every known mark."""
     dictionary = dictionary or get_dict()
     w = (word or "").strip().lower()
-    return len(w)==5 and w.isalpha() and (w in dictionary)
+    if not (len(w)==5 and w.isalpha() and (w in dictionary)): return False
+    return constraints is None or compile_constraints(constraints)(w)
 
 def respects_constraints(word: str, constraints: Dict) -> bool:
     w = word.lower()
@@ -65,9 +68,15 @@ def respects_constraints(word: str, constraints: Dict) -> bool:
             return False
     return True
 
-def filter_candidates(constraints: Dict, dictionary: List[str] | None = None) -> List[str]:
-    dictionary = dictionary or get_dict()
-    return [w for w in dictionary if respects_constraints(w, constraints)]
+def get_index() -> WordIndex:
+    load_dictionary()
+    return _INDEX or WordIndex([])
+
+def filter_candidates(constraints: Dict, dictionary: Sequence[str] | None = None) -> List[str]:
+    """Bitset path for the loaded dictionary; per-word scan for any other list."""
+    if not dictionary or dictionary is _DICT or dictionary == get_dict():
+        return get_index().filter(constraints)
+    return compile_constraints(constraints).filter(dictionary)
 
 def info_gain_score(word: str, candidates: List[str]) -> float:
     if not candidates: return 0.0
@@ -81,17 +90,29 @@ def info_gain_score(word: str, candidates: List[str]) -> float:
             used.add(ch)
     return float(score)
 
+def info_gain_scores(candidates: List[str]) -> List[float]:
+    """info_gain_score for every candidate, sharing one set of position counts."""
+    if not candidates: return []
+    n = len(candidates)
+    pos_counts = [Counter([w[i] for w in candidates]) for i in range(5)]
+    totals = Counter()
+    for pc in pos_counts: totals.update(pc)
+    out = []
+    for w in candidates:
+        s = sum(pos_counts[i].get(ch,0) for i,ch in enumerate(w))/max(1,n)
+        s += sum(totals.get(ch,0) for ch in set(w))/max(1,5*n)
+        out.append(float(s))
+    return out
+
+def candidate_count(sb: Dict) -> float:
+    """Size of the candidate set for the constraints in `sb` (bitset popcount)."""
+    return float(get_index().count(sb.get("state",{}).get("constraints") or {}))
+
 def measure_state(sb: Dict) -> Dict[str,float]:
     """For foundation proof checks: size of the candidate set."""
     if sb.get("project",{}).get("id") != "wordle":
         return {}
-    cons = sb.get("state",{}).get("constraints", {
-        "greens":["","","","",""],
-        "yellows_not_here":[[],[],[],[],[]],
-        "must_include":[],
-        "must_exclude":[],
-        "min_counts":{},
-        "max_counts":{}
-    })
-    cands = filter_candidates(cons, get_dict())
-    return {"candidate_count": float(len(cands))}
+    return {"candidate_count": candidate_count(sb)}
+
+register_metric("candidate_count", ("/state/constraints",), candidate_count,
+                project="wordle", salt=lambda: get_dict().digest)
@@ -0,0 +1,85 @@
+# server/foundation/modules/wordle/index.py
+# Compiled bitset index over the word list. Bit i of every mask stands for words[i],
+# so a whole constraints dict collapses into a handful of big-int AND/ANDNOT ops.
+from typing import Dict, List, Sequence
+
+# bit offsets set in each byte value (used to decode a mask back into words)
+_BYTE_BITS = tuple(tuple(b for b in range(8) if (v >> b) & 1) for v in range(256))
+
+def _pack(idxs: List[int], nbytes: int) -> int:
+    buf = bytearray(nbytes)
+    for i in idxs:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+class WordIndex:
+    """Per-position letter bitsets, letter-presence masks and per-letter count masks."""
+
+    def __init__(self, words: Sequence[str]):
+        self.words: List[str] = list(words)
+        n = len(self.words)
+        self.full = (1 << n) - 1
+        pos_idx: List[Dict[str, List[int]]] = [{} for _ in range(5)]
+        has_idx: Dict[str, List[int]] = {}
+        # ge_idx[ch][k-1] = indices of words containing ch at least k times (k = 1..5)
+        ge_idx: Dict[str, List[List[int]]] = {}
+        for i, w in enumerate(self.words):
+            for j, ch in enumerate(w[:5]):
+                pos_idx[j].setdefault(ch, []).append(i)
+            for ch in set(w):
+                has_idx.setdefault(ch, []).append(i)
+                ge = ge_idx.setdefault(ch, [[], [], [], [], []])
+                for k in range(min(5, w.count(ch))):
+                    ge[k].append(i)
+        nbytes = (n + 7) // 8 or 1
+        self.pos: List[Dict[str, int]] = [{ch: _pack(ix, nbytes) for ch, ix in p.items()} for p in pos_idx]
+        self.has: Dict[str, int] = {ch: _pack(ix, nbytes) for ch, ix in has_idx.items()}
+        # count_ge[ch][k] = words containing ch at least k times (k = 0..5)
+        self.count_ge: Dict[str, List[int]] = {
+            ch: [self.full] + [_pack(ix, nbytes) for ix in ge] for ch, ge in ge_idx.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def _at_least(self, ch: str, k: int) -> int:
+        if k <= 0: return self.full
+        if k > 5: return 0
+        ge = self.count_ge.get(ch)
+        return ge[k] if ge else 0
+
+    def mask(self, constraints: Dict) -> int:
+        """Bitmask of words satisfying `constraints` (same semantics as respects_constraints)."""
+        m = self.full
+        for i, g in enumerate(constraints.get("greens", ["","","","",""])[:5]):
+            if g: m &= self.pos[i].get(g.lower(), 0)
+        for i, bads in enumerate(constraints.get("yellows_not_here", [[],[],[],[],[]])[:5]):
+            for b in bads:
+                if b: m &= ~self.pos[i].get(b.lower(), 0)
+        for ch in constraints.get("must_exclude", []):
+            if ch: m &= ~self.has.get(ch.lower(), 0)
+        for ch in constraints.get("must_include", []):
+            if ch: m &= self.has.get(ch.lower(), 0)
+        for ch, cnt in constraints.get("min_counts", {}).items():
+            m &= self._at_least(ch.lower(), int(cnt))
+        for ch, cnt in constraints.get("max_counts", {}).items():
+            m &= ~self._at_least(ch.lower(), int(cnt) + 1)
+        return m & self.full
+
+    def count(self, constraints: Dict) -> int:
+        """Number of words satisfying `constraints` (a popcount; nothing is decoded)."""
+        return self.mask(constraints).bit_count()
+
+    def decode(self, mask: int) -> List[str]:
+        """Words whose bits are set in `mask`, in dictionary order."""
+        if not mask: return []
+        words = self.words; out: List[str] = []
+        raw = mask.to_bytes((len(words) + 7) // 8 or 1, "little")
+        for bi, byte in enumerate(raw):
+            if byte:
+                base = bi * 8
+                out.extend(words[base + b] for b in _BYTE_BITS[byte])
+        return out
+
+    def filter(self, constraints: Dict) -> List[str]:
+        return self.decode(self.mask(constraints))
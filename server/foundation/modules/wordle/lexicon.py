@@ -0,0 +1,146 @@
+# server/foundation/modules/wordle/lexicon.py
+# Immutable, process-wide word list. dictionary.txt is compiled once into dictionary.bin
+# (a small header, the words as fixed-width 5-byte records in file order, then the same records
+# sorted) and memory-mapped on load. Lookups and membership read the mapping in place, so a
+# process holds one mapping instead of a decoded copy; callers share one Lexicon object.
+import hashlib, mmap, struct, time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+WIDTH = 5
+MAGIC = b"WDL2"
+_HDR = struct.Struct("<4sIQQ16s")   # magic, count, source size, source mtime_ns, digest
+RELOAD_CHECK_S = 2.0                # how often a hot path may stat() the source file
+
+def _digest(words: Sequence[str]) -> str:
+    return hashlib.sha1("\n".join(words).encode("utf-8")).hexdigest()[:16]
+
+def read_words(text: str) -> List[str]:
+    """Lowercased 5-letter a-z words, in file order (one per line or whitespace-separated)."""
+    out = []
+    for tok in text.split():
+        w = tok.strip().lower()
+        if len(w) == WIDTH and w.isalpha() and w.isascii():
+            out.append(w)
+    return out
+
+class Lexicon(Sequence[str]):
+    """Read-only word list over fixed-width records: file order for indexing and numpy, a sorted
+    copy for membership by bisection. Words are decoded only when they are read."""
+    __slots__ = ("packed", "digest", "source", "_buf", "_keys", "_mm", "_n")
+
+    def __init__(self, words: Sequence[str], digest: str = "", source: Optional[Path] = None):
+        words = list(words)
+        body = "".join(words).encode("ascii") + b"".join(sorted(w.encode("ascii") for w in words))
+        self._init(body + b"".join(sorted(w.encode("ascii") for w in words)), 0, len(words),
+                   digest or _digest(words), source, None)
+
+    @classmethod
+    def _mapped(cls, mm: mmap.mmap, n: int, digest: str, source: Path) -> "Lexicon":
+        lex = cls.__new__(cls)
+        lex._init(mm, _HDR.size, n, digest, source, mm)
+        return lex
+
+    def _init(self, buf, at: int, n: int, digest: str, source: Optional[Path], mm) -> None:
+        self.packed = memoryview(buf)[at:at + n * WIDTH]
+        self.digest, self.source = digest, source
+        self._buf, self._keys, self._mm, self._n = buf, at + n * WIDTH, mm, n
+
+    def __len__(self) -> int: return self._n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice): return [self[j] for j in range(*i.indices(self._n))]
+        if i < 0: i += self._n
+        if not 0 <= i < self._n: raise IndexError("Lexicon index out of range")
+        return bytes(self.packed[i * WIDTH:(i + 1) * WIDTH]).decode("ascii")
+
+    def __iter__(self) -> Iterator[str]:
+        packed = self.packed
+        for o in range(0, self._n * WIDTH, WIDTH):
+            yield bytes(packed[o:o + WIDTH]).decode("ascii")
+
+    def __contains__(self, w) -> bool:
+        if not isinstance(w, str) or len(w) != WIDTH or not w.isascii(): return False
+        key, buf, base = w.encode("ascii"), self._buf, self._keys
+        lo, hi = 0, self._n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            o = base + mid * WIDTH
+            if buf[o:o + WIDTH] < key: lo = mid + 1
+            else: hi = mid
+        return lo < self._n and buf[base + lo * WIDTH:base + (lo + 1) * WIDTH] == key
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Lexicon): return self.digest == other.digest
+        try: return len(other) == self._n and all(a == b for a, b in zip(self, other))
+        except TypeError: return NotImplemented
+    def __hash__(self) -> int: return hash(self.digest)
+    def __repr__(self) -> str: return f"Lexicon({self._n} words, {self.digest})"
+
+EMPTY = Lexicon(())
+
+def snapshot_path(src: Path) -> Path:
+    return src.with_suffix(".bin")
+
+def build_snapshot(src: Path, dst: Optional[Path] = None) -> Path:
+    dst = dst or snapshot_path(src)
+    st = src.stat()
+    words = read_words(src.read_text(encoding="utf-8"))
+    body = "".join(words).encode("ascii") + b"".join(sorted(w.encode("ascii") for w in words))
+    tmp = dst.with_name(dst.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_HDR.pack(MAGIC, len(words), st.st_size, st.st_mtime_ns, _digest(words).encode("ascii")))
+        f.write(body)
+    tmp.replace(dst)
+    return dst
+
+def open_snapshot(path: Path, src_stat=None) -> Optional[Lexicon]:
+    """Map a snapshot; None if it is missing, malformed or older than the source file."""
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        magic, n, size, mtime_ns, digest = _HDR.unpack_from(mm, 0)
+        if magic != MAGIC or len(mm) != _HDR.size + 2 * n * WIDTH: raise ValueError("bad snapshot")
+        if src_stat is not None and (size, mtime_ns) != (src_stat.st_size, src_stat.st_mtime_ns):
+            raise ValueError("stale snapshot")
+        return Lexicon._mapped(mm, n, digest.decode("ascii"), path)
+    except Exception:
+        mm.close()
+        return None
+
+def _load_from(src: Path) -> Lexicon:
+    st = src.stat() if src.exists() else None
+    bin_path = snapshot_path(src)
+    lex = open_snapshot(bin_path, st)
+    if lex is not None: return lex
+    if st is None: return EMPTY
+    try:
+        return open_snapshot(build_snapshot(src, bin_path), st) or EMPTY
+    except OSError:  # read-only tree: keep the words in memory only
+        return Lexicon(read_words(src.read_text(encoding="utf-8")), source=src)
+
+# ---- per-path cache; the source is stat()ed at most every RELOAD_CHECK_S ----
+_CACHE: Dict[str, Tuple[Lexicon, Optional[Tuple[int, int]], float]] = {}
+
+def load(src: Path) -> Lexicon:
+    key = str(src); now = time.monotonic()
+    hit = _CACHE.get(key)
+    if hit is not None and now - hit[2] < RELOAD_CHECK_S:
+        return hit[0]
+    st = src.stat() if src.exists() else None
+    sig = (st.st_size, st.st_mtime_ns) if st else None
+    if hit is not None and hit[1] == sig:
+        _CACHE[key] = (hit[0], sig, now)
+        return hit[0]
+    lex = _load_from(src)
+    _CACHE[key] = (lex, sig, now)
+    return lex
+
+if __name__ == "__main__":
+    import json, sys
+    src = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).resolve().parent / "dictionary.txt"
+    dst = build_snapshot(src)
+    print(json.dumps({"type": "lexicon", "source": str(src), "snapshot": str(dst), "words": len(load(src))}))
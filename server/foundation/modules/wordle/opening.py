@@ -0,0 +1,112 @@
+# server/foundation/modules/wordle/opening.py
+# Opening book: the suggester's turn-1 move and its turn-2 move for every feedback pattern,
+# precomputed once per (dictionary content, heuristics weights). Entries are keyed by a digest
+# of the candidate set, so they match however the user phrased the marks.
+import hashlib, json, threading, time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .patterns import get_matrix, words_digest, ALL_GREEN, _FAILED as _MATRIX_FAILED
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+BOOK_PATH = Path(__file__).resolve().parent / "opening_book.json"
+BOOK_TURNS = 2
+MATRIX_WAIT_S = 300
+RETRY_S = 600  # after a failed rebuild, wait this long before trying again
+
+Rank = Callable[[List[str], List[str], Dict, int], tuple]
+
+def heur_digest(heur: Dict) -> str:
+    """Hash of the parts of heuristics.json that change the suggester's choice."""
+    body = {"weights": heur.get("weights", {}),
+            "rules": sorted((str(r.get("id","")), float(r.get("weight", 0))) for r in heur.get("rules", []))}
+    return hashlib.sha1(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+def build_book(words: List[str], heur: Dict, rank: Rank) -> Optional[Dict]:
+    """Turn-1 move plus the turn-2 move for each feedback pattern of it (needs the pattern matrix)."""
+    pm = get_matrix(words, build=False)
+    if pm is None or np is None: return None
+    first = rank(words, words, heur, 1)[0]
+    moves = {words_digest(words): first}
+    codes = np.asarray(pm.m[pm.row[first]])
+    for code in np.unique(codes):
+        if int(code) == ALL_GREEN: continue
+        cands = [words[i] for i in np.flatnonzero(codes == code)]
+        moves[words_digest(cands)] = rank(cands, words, heur, 2)[0]
+    return {"version": 1, "dict": words_digest(words), "heur": heur_digest(heur), "first": first,
+            "built": datetime.now(timezone.utc).isoformat(), "moves": moves}
+
+def save_book(book: Dict, path: Optional[Path] = None) -> None:
+    path = path or BOOK_PATH
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(book, separators=(",", ":")), encoding="utf-8")
+    tmp.replace(path)
+
+# ---- loaded book (mtime-cached) + background rebuild ----
+_BOOK: Optional[Dict] = None
+_BOOK_MTIME = None
+_BUILDING: Dict[tuple, threading.Thread] = {}
+_LOCK = threading.Lock()
+
+def load_book() -> Optional[Dict]:
+    global _BOOK, _BOOK_MTIME
+    mtime = BOOK_PATH.stat().st_mtime if BOOK_PATH.exists() else None
+    if mtime != _BOOK_MTIME:
+        try: _BOOK = json.loads(BOOK_PATH.read_text(encoding="utf-8")) if mtime else None
+        except Exception: _BOOK = None
+        _BOOK_MTIME = mtime
+    return _BOOK
+
+def _rebuild(words: List[str], heur: Dict, rank: Rank) -> bool:
+    digest = words_digest(words)
+    end = time.time() + MATRIX_WAIT_S
+    while get_matrix(words) is None and time.time() < end:  # get_matrix starts the matrix build
+        if digest in _MATRIX_FAILED: return False               # it will not appear
+        time.sleep(1.0)
+    try:
+        book = build_book(words, heur, rank)
+        if book: save_book(book)
+        return bool(book)
+    except Exception:
+        return False
+
+_FAILED_AT: Dict[tuple, float] = {}
+
+def _run_rebuild(key: tuple, words: List[str], heur: Dict, rank: Rank) -> None:
+    if not _rebuild(words, heur, rank):
+        _FAILED_AT[key] = time.time()
+
+def _start_rebuild(key: tuple, words: List[str], heur: Dict, rank: Rank) -> None:
+    if np is None: return  # no matrix without numpy, so no book either
+    with _LOCK:
+        t = _BUILDING.get(key)
+        if t is not None and t.is_alive(): return
+        if time.time() - _FAILED_AT.get(key, 0.0) < RETRY_S: return
+        t = _BUILDING[key] = threading.Thread(target=_run_rebuild, args=(key, list(words), dict(heur), rank), daemon=True)
+        t.start()
+
+def book_move(cands: List[str], words: List[str], heur: Dict, turn_idx: int, rank: Rank) -> Optional[str]:
+    """Booked guess for this candidate set, or None (a stale book is rebuilt in the background)."""
+    if turn_idx > BOOK_TURNS or not cands: return None
+    key = (words_digest(words), heur_digest(heur))
+    book = load_book()
+    if not book or (book.get("dict"), book.get("heur")) != key:
+        _start_rebuild(key, words, heur, rank)
+        return None
+    return book.get("moves", {}).get(words_digest(cands))
+
+if __name__ == "__main__":
+    from .checker import get_dict
+    from .patterns import build_and_save, matrix_path
+    from .suggest import _load_heuristics, rank_candidates
+    words = get_dict()
+    if not matrix_path(words).exists(): build_and_save(words)
+    book = build_book(words, _load_heuristics(), rank_candidates)
+    if book: save_book(book)
+    print(json.dumps({"type": "opening_book", "path": str(BOOK_PATH), "first": (book or {}).get("first"),
+                      "entries": len((book or {}).get("moves", {}))}))
@@ -1,6 +1,9 @@
-import re
+import copy, re
 from typing import Dict, List
 
+from .candidates import invalidate, new_game_id
+from .checker import valid_word
+
 _POS = {"first":0,"1st":0,"second":1,"2nd":1,"third":2,"3rd":2,"fourth":3,"4th":3,"fifth":4,"5th":4}
 _DEFAULT = {
     "greens": ["","","","",""],
@@ -11,21 +14,28 @@ _DEFAULT = {
     "max_counts": {}
 }
 
-def ensure_bootstrap(sb: Dict) -> None:
+def ensure_bootstrap(sb: Dict) -> bool:
+    """Fill in missing Wordle fields; True if anything was added (the caller must then save)."""
+    size = lambda: (len(sb), len(sb.get("project",{})), len(sb.get("state",{})))
+    before = size()
     sb.setdefault("project",{}); sb.setdefault("state",{})
-    if sb["project"].get("id") != "wordle": return
+    if sb["project"].get("id") != "wordle": return size() != before
     sb["project"].setdefault("goal","Solve today's Wordle in ≤ 4 guesses.")
     sb["project"].setdefault("deliverable","Legal 5-letter guesses until solved.")
     sb["project"].setdefault("success_checks",["valid_word","respects_constraints","novel_guess"])
-    sb["state"].setdefault("constraints",{k:(v.copy() if isinstance(v,list) else v) for k,v in _DEFAULT.items()})
+    sb["state"].setdefault("constraints",copy.deepcopy(_DEFAULT))
     sb["state"].setdefault("history",[])
     sb["state"].setdefault("_last_guess","")
+    sb["state"].setdefault("_game", new_game_id())
+    return size() != before
 
 def _reset(sb: Dict) -> None:
     sb.setdefault("state",{})
-    sb["state"]["constraints"] = {k:(v.copy() if isinstance(v,list) else v) for k,v in _DEFAULT.items()}
+    invalidate(sb)  # drop the cached survivors of the finished game
+    sb["state"]["constraints"] = copy.deepcopy(_DEFAULT)
     sb["state"]["history"] = []
     sb["state"]["_last_guess"] = ""
+    sb["state"]["_game"] = new_game_id()
 
 def _uniq_inplace(lst: List[str]) -> None:
     s=set(); i=0
@@ -62,6 +72,49 @@ def compact_summary(sb: Dict) -> Dict:
     greens = "".join([c if c else "_" for c in cons["greens"]])
     return {"greens":greens, "must_include":cons["must_include"], "must_exclude":cons["must_exclude"]}
 
+_MARKS = {"g": 2, "y": 1, "b": 0, "x": 0, ".": 0, "-": 0}
+
+def apply_marks(sb: Dict, guess: str, pattern: str, hard: bool = False) -> bool:
+    """Structured feedback: guess + G/Y/B mark string (e.g. "crane", "GYBBB"), no text parsing.
+    Repeated letters follow Wordle rules: G+Y marks give a minimum count, a B next to them caps it.
+    hard=True (hard mode): the guess must be a dictionary word that respects every earlier mark."""
+    if sb.get("project",{}).get("id")!="wordle": return False
+    g = (guess or "").strip().lower(); p = (pattern or "").strip().lower()
+    if len(g) != 5 or not g.isalpha():
+        raise ValueError(f"guess must be 5 letters: {guess!r}")
+    if len(p) != 5 or any(c not in _MARKS for c in p):
+        raise ValueError(f"pattern must be 5 of G/Y/B: {pattern!r}")
+
+    ensure_bootstrap(sb)
+    cons = sb["state"]["constraints"]; cons.setdefault("min_counts",{}); cons.setdefault("max_counts",{})
+    if hard and not valid_word(g, constraints=cons):
+        raise ValueError(f"hard mode: {guess!r} is not a word that fits the marks so far")
+    sb["state"]["_last_guess"] = g
+    sb["state"]["history"].append({"guess": g, "marks": p.upper()})
+
+    hits: Dict[str, int] = {}; grayed = set()
+    for idx, (ch, m) in enumerate(zip(g, p)):
+        mark = _MARKS[m]
+        if mark == 2:
+            cons["greens"][idx] = ch
+            if ch in cons["must_exclude"]: cons["must_exclude"].remove(ch)
+        elif ch not in cons["yellows_not_here"][idx]:
+            cons["yellows_not_here"][idx].append(ch)  # yellow or gray: not at this spot
+        if mark: hits[ch] = hits.get(ch, 0) + 1
+        else: grayed.add(ch)
+    for ch in dict.fromkeys(g):
+        k = hits.get(ch, 0)
+        if k:
+            if ch not in cons["must_include"]: cons["must_include"].append(ch)
+            cons["min_counts"][ch] = max(int(cons["min_counts"].get(ch,0)), k)
+        if ch not in grayed: continue
+        if not k and ch not in cons["greens"] and ch not in cons["must_include"]:
+            if ch not in cons["must_exclude"]: cons["must_exclude"].append(ch)
+        else:  # present, and this many copies at most
+            cap = max(k, int(cons["min_counts"].get(ch,0)), cons["greens"].count(ch))
+            cons["max_counts"][ch] = min(int(cons["max_counts"].get(ch,cap)), cap)
+    return True
+
 def apply_from_nl(sb: Dict, user_text: str) -> bool:
     """Parse plain English feedback (yellow/green/gray, ordinals, doubles, reset)."""
     if sb.get("project",{}).get("id")!="wordle": return False
@@ -0,0 +1,156 @@
+# server/foundation/modules/wordle/patterns.py
+# Guess x answer feedback matrix (uint8, base-3 codes: 0=gray 1=yellow 2=green, digit i = 3**i)
+# built once per word list and memory-mapped from a .npy next to dictionary.txt.
+import hashlib, threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+DATA_DIR = Path(__file__).resolve().parent
+N_PATTERNS = 243  # 3**5
+ALL_GREEN = N_PATTERNS - 1
+_CHUNK = 256
+_CELLS = 1 << 21  # guess x answer cells scored per entropy slice
+
+def feedback(guess: str, answer: str) -> int:
+    """Wordle feedback code for one pair (duplicate letters consume answer letters left to right)."""
+    code = [0]*5; left: Dict[str, int] = {}
+    for i in range(5):
+        if guess[i] == answer[i]: code[i] = 2
+        else: left[answer[i]] = left.get(answer[i], 0) + 1
+    for i in range(5):
+        if code[i] == 0 and left.get(guess[i], 0) > 0:
+            code[i] = 1; left[guess[i]] -= 1
+    return sum(c * 3**i for i, c in enumerate(code))
+
+def words_digest(words: Sequence[str]) -> str:
+    digest = getattr(words, "digest", None)  # a Lexicon carries its own
+    if digest: return digest
+    return hashlib.sha1("\n".join(words).encode("utf-8")).hexdigest()[:16]
+
+def ascii_words(words: Sequence[str]) -> bool:
+    return getattr(words, "packed", None) is not None or "".join(words).isascii()
+
+def encode_words(words: Sequence[str]):
+    packed = getattr(words, "packed", None)  # a Lexicon is already fixed-width ascii
+    raw = np.frombuffer(packed if packed is not None else "".join(words).encode("ascii"), dtype=np.uint8).reshape(len(words), 5)
+    return raw - ord("a")
+
+def feedback_block(g, a):
+    """Feedback codes for encoded guesses g (B,5) against encoded answers a (N,5) -> (B,N) uint8."""
+    n = len(a)
+    counts = np.zeros((256, n), dtype=np.uint8)                  # counts[letter, answer]
+    for j in range(5):
+        np.add.at(counts, (a[:, j], np.arange(n)), 1)
+    green = [g[:, i, None] == a[None, :, i] for i in range(5)]
+    code = np.zeros((len(g), n), dtype=np.uint8)
+    for i in range(5):
+        c = g[:, i]
+        avail = counts[c].copy()                                  # copies of g[i] in each answer...
+        for j in range(5):                                        # ...minus those already matched green
+            avail -= green[j] & (g[:, j] == c)[:, None]
+        prior = np.zeros_like(avail)                              # earlier non-green copies in the guess
+        for k in range(i):
+            prior += ~green[k] & (g[:, k] == c)[:, None]
+        yellow = ~green[i] & (avail > prior)
+        code += (green[i] * 2 + yellow).astype(np.uint8) * np.uint8(3**i)
+    return code
+
+def entropy_of_codes(codes):
+    """Expected information (bits) of each row of a (G,K) block of feedback codes."""
+    g, k = codes.shape
+    if k == 0: return np.zeros(g)
+    counts = np.bincount((np.asarray(codes, dtype=np.int64) + (np.arange(g) * N_PATTERNS)[:, None]).ravel(),
+                         minlength=g * N_PATTERNS).reshape(g, N_PATTERNS)
+    p = counts / k
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return -np.where(p > 0, p * np.log2(p), 0.0).sum(axis=1)
+
+def build_matrix(words: Sequence[str]):
+    """Vectorized build of the full len(words) x len(words) feedback matrix."""
+    enc = encode_words(words); n = len(words)
+    out = np.empty((n, n), dtype=np.uint8)
+    for lo in range(0, n, _CHUNK):
+        out[lo:lo+_CHUNK] = feedback_block(enc[lo:lo+_CHUNK], enc)
+    return out
+
+class PatternMatrix:
+    def __init__(self, words: Sequence[str], matrix):
+        self.words: List[str] = list(words)
+        self.row: Dict[str, int] = {w: i for i, w in enumerate(self.words)}
+        self.m = matrix
+
+    def rows_for(self, words: Sequence[str]):
+        return np.fromiter((self.row[w] for w in words), dtype=np.int64, count=len(words))
+
+    def entropies(self, guess_rows, answer_rows):
+        """Exact expected information (bits) of each guess row over the given answer columns."""
+        k = len(answer_rows); out = np.zeros(len(guess_rows))
+        if k == 0: return out
+        step = max(1, _CELLS // k)                                # bound the temporary histogram size
+        for lo in range(0, len(guess_rows), step):
+            sub = self.m[np.ix_(guess_rows[lo:lo+step], answer_rows)]
+            out[lo:lo+len(sub)] = entropy_of_codes(sub)
+        return out
+
+# ---- per-process cache; the .npy is keyed by the word-list digest ----
+_CACHE: Dict[str, PatternMatrix] = {}
+_BUILDING: Dict[str, threading.Thread] = {}
+_FAILED: set = set()
+_LOCK = threading.Lock()
+
+def matrix_path(words: Sequence[str], directory: Path | None = None) -> Path:
+    return (directory or DATA_DIR) / f"patterns-{words_digest(words)}.npy"
+
+def build_and_save(words: Sequence[str], directory: Path | None = None) -> Path:
+    p = matrix_path(words, directory)
+    tmp = p.with_name(p.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, build_matrix(words))
+    tmp.replace(p)  # only this digest's file; matrices of other word lists may be mapped elsewhere
+    return p
+
+def _build_bg(words: List[str], digest: str) -> None:
+    try: build_and_save(words)
+    except Exception: _FAILED.add(digest)
+
+def get_matrix(words: Sequence[str], build: bool = True) -> Optional[PatternMatrix]:
+    """Mapped matrix for `words`, or None while it is missing (a background build is started)."""
+    if np is None or not words: return None
+    digest = words_digest(words)
+    pm = _CACHE.get(digest)
+    if pm is not None: return pm
+    p = matrix_path(words)
+    if p.exists():
+        try:
+            m = np.load(p, mmap_mode="r")
+            if m.shape == (len(words), len(words)):
+                pm = _CACHE[digest] = PatternMatrix(words, m)
+                return pm
+        except Exception:
+            pass
+    if build and digest not in _FAILED and ascii_words(words):
+        with _LOCK:
+            if digest not in _BUILDING or not _BUILDING[digest].is_alive():
+                t = threading.Thread(target=_build_bg, args=(list(words), digest), daemon=True)
+                _BUILDING[digest] = t; t.start()
+    return None
+
+def best_by_entropy(cands: Sequence[str], words: Sequence[str]) -> Optional[Tuple[str, float]]:
+    """Highest expected-information candidate, or None when the matrix is not available yet."""
+    pm = get_matrix(words)
+    if pm is None or not cands: return None
+    rows = pm.rows_for(cands)
+    h = pm.entropies(rows, rows)
+    i = int(np.argmax(h))
+    return cands[i], float(h[i])
+
+if __name__ == "__main__":
+    import json
+    from .checker import get_dict
+    words = get_dict()
+    print(json.dumps({"type": "patterns", "words": len(words), "path": str(build_and_save(words))}))
@@ -0,0 +1,82 @@
+# server/foundation/modules/wordle/predicate.py
+# Constraint compiler. A constraints dict becomes one immutable Predicate (a positional regex
+# plus a short tuple of letter-count bounds), cached by the canonical hash of the constraints,
+# so per-word checks stop re-deriving sets and count maps from the raw lists.
+import hashlib, json, re
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MAX_COMPILED = 512
+
+def canonical(cons: Dict) -> Dict:
+    """Order-insensitive, lowercased form of a constraints dict."""
+    greens = [(g or "").lower() for g in (list(cons.get("greens", [])) + [""]*5)[:5]]
+    ynh = (list(cons.get("yellows_not_here", [])) + [[]]*5)[:5]
+    return {
+        "greens": greens,
+        "yellows_not_here": [sorted({b.lower() for b in bads if b}) for bads in ynh],
+        "must_include": sorted({c.lower() for c in cons.get("must_include", []) if c}),
+        "must_exclude": sorted({c.lower() for c in cons.get("must_exclude", []) if c}),
+        "min_counts": {k.lower(): int(v) for k, v in sorted(cons.get("min_counts", {}).items())},
+        "max_counts": {k.lower(): int(v) for k, v in sorted(cons.get("max_counts", {}).items())},
+    }
+
+def digest(canon: Dict) -> str:
+    return hashlib.sha1(json.dumps(canon, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+def fingerprint(cons: Dict) -> str:
+    """Stable hash of a constraints dict; equal for any list order or letter case."""
+    return digest(canonical(cons))
+
+class Predicate:
+    """Compiled form of one constraints dict; call it with a word (same semantics as respects_constraints)."""
+    __slots__ = ("fp", "_rx", "_counts", "_never")
+
+    def __init__(self, canon: Dict, fp: str = ""):
+        self.fp = fp or digest(canon)
+        exclude = set(canon["must_exclude"])
+        greens, ynh = canon["greens"], canon["yellows_not_here"]
+        # a green that is also excluded or banned from its own spot can never match
+        self._never = any(g and (g in exclude or g in ynh[i]) for i, g in enumerate(greens))
+        parts = []
+        for i, g in enumerate(greens):
+            if g:
+                parts.append(re.escape(g))
+            else:
+                banned = "".join(sorted(exclude | set(ynh[i])))
+                parts.append(f"[^{re.escape(banned)}]" if banned else ".")
+        self._rx = re.compile("".join(parts) + r"\Z", re.DOTALL)
+        lo = {ch: 1 for ch in canon["must_include"]}
+        for ch, v in canon["min_counts"].items(): lo[ch] = max(lo.get(ch, 0), v)
+        hi = canon["max_counts"]
+        # only bounds the regex cannot express; an included letter with no greens needs a count check
+        self._counts: Tuple[Tuple[str, int, int], ...] = tuple(
+            (ch, lo.get(ch, 0), hi.get(ch, 5)) for ch in sorted(set(lo) | set(hi))
+            if hi.get(ch, 5) < 5 or lo.get(ch, 0) > greens.count(ch))
+
+    def __call__(self, word: str) -> bool:
+        if self._never: return False
+        w = word.lower()
+        if self._rx.match(w) is None: return False
+        for ch, lo, hi in self._counts:
+            n = w.count(ch)
+            if n < lo or n > hi: return False
+        return True
+
+    def filter(self, words: Iterable[str]) -> List[str]:
+        return [w for w in words if self(w)]
+
+_COMPILED: "OrderedDict[str, Predicate]" = OrderedDict()
+
+def compile_constraints(cons: Dict, canon: Optional[Dict] = None, fp: Optional[str] = None) -> Predicate:
+    """Cached Predicate for `cons` (pass canon/fp when the caller already has them)."""
+    if fp is None:
+        canon = canon or canonical(cons); fp = digest(canon)
+    p = _COMPILED.get(fp)
+    if p is not None:
+        _COMPILED.move_to_end(fp)
+        return p
+    p = _COMPILED[fp] = Predicate(canon or canonical(cons), fp)
+    while len(_COMPILED) > MAX_COMPILED:
+        _COMPILED.popitem(last=False)
+    return p
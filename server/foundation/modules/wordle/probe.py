@@ -0,0 +1,163 @@
+# server/foundation/modules/wordle/probe.py
+# Probe-word search: score every dictionary word (not just survivors) against the current
+# candidates. The guess space is sharded over a process pool; the encoded word list lives in
+# one SharedMemory block that workers attach to once, so nothing large is pickled per call.
+# probe_search is a coroutine: shard results are awaited, never waited for on the event loop.
+import asyncio, atexit, multiprocessing, os, threading, time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+    from multiprocessing import shared_memory
+except Exception:
+    np = None
+
+from .patterns import ascii_words, encode_words, feedback_block, entropy_of_codes, matrix_path, words_digest
+
+PROBE_WORKERS   = int(os.getenv("WORDLE_PROBE_WORKERS", "0") or 0) or max(1, (os.cpu_count() or 2) - 1)
+PROBE_BUDGET_MS = float(os.getenv("WORDLE_PROBE_MS", "150"))
+PROBE_MIN_GAIN  = 0.25  # bits a non-candidate must beat the best candidate by (it cannot win this turn)
+_SHARDS_PER_WORKER = 4
+_MATRIX_RECHECK_S  = 1.0
+
+def _mp_context():
+    """forkserver/spawn: the server already runs threads (store timers, matrix build), so no fork."""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+# ---------------- worker side ----------------
+_W: Dict = {}
+
+def _worker_init(shm_name: str, n: int, mpath: str) -> None:
+    shm = shared_memory.SharedMemory(name=shm_name)  # attach only; the parent owns and unlinks it
+    _W["shm"] = shm
+    _W["enc"] = np.ndarray((n, 5), dtype=np.uint8, buffer=shm.buf)
+    _W["mpath"], _W["m"], _W["checked"] = mpath, None, 0.0
+
+def _matrix():
+    """The feedback matrix once it exists; it may be built after the pool started, so look again
+    at most every _MATRIX_RECHECK_S."""
+    m = _W.get("m")
+    if m is None and _W.get("mpath") and time.monotonic() - _W["checked"] >= _MATRIX_RECHECK_S:
+        _W["checked"] = time.monotonic()
+        try:
+            if os.path.exists(_W["mpath"]): m = _W["m"] = np.load(_W["mpath"], mmap_mode="r")
+        except Exception:
+            pass
+    return m
+
+def _score_shard(lo: int, hi: int, answer_rows: List[int]) -> tuple:
+    """(best row, its bits, best candidate row or -1, its bits) for guesses lo..hi-1."""
+    ans = np.asarray(answer_rows, dtype=np.int64)
+    m = _matrix()
+    codes = m[lo:hi][:, ans] if m is not None else feedback_block(_W["enc"][lo:hi], _W["enc"][ans])
+    h = entropy_of_codes(codes)
+    i = int(np.argmax(h))
+    is_cand = np.isin(np.arange(lo, hi), ans)
+    if is_cand.any():
+        hc = np.where(is_cand, h, -1.0); j = int(np.argmax(hc))
+        return lo + i, float(h[i]), lo + j, float(hc[j])
+    return lo + i, float(h[i]), -1, -1.0
+
+# ---------------- parent side ----------------
+class _Pool:
+    def __init__(self, words: Sequence[str]):
+        self.words = list(words)
+        self.row = {w: i for i, w in enumerate(self.words)}
+        self.digest = words_digest(self.words)
+        enc = encode_words(self.words)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, enc.nbytes))
+        np.ndarray(enc.shape, dtype=np.uint8, buffer=self.shm.buf)[:] = enc
+        mpath = matrix_path(self.words)
+        self.ex = ProcessPoolExecutor(max_workers=PROBE_WORKERS, mp_context=_mp_context(),
+                                      initializer=_worker_init, initargs=(self.shm.name, len(self.words), str(mpath)))
+
+    def close(self) -> None:
+        # wait for the workers: one still starting up would find the shared block already unlinked
+        self.ex.shutdown(wait=True, cancel_futures=True)
+        try: self.shm.close(); self.shm.unlink()
+        except Exception: pass
+
+_POOL: Optional[_Pool] = None
+_LOCK = threading.Lock()
+
+def _pool_for(words: Sequence[str]) -> _Pool:
+    global _POOL
+    with _LOCK:
+        if _POOL is None or _POOL.digest != words_digest(words):
+            if _POOL is not None: _POOL.close()
+            _POOL = _Pool(words)
+        return _POOL
+
+def _ready() -> bool:
+    return True
+
+def warm(words: Sequence[str]) -> None:
+    """Start the pool and its workers now (blocking; call off the event loop), so the first
+    probe is not spent on process start-up."""
+    if np is None or not words or not ascii_words(words): return
+    pool = _pool_for(words)
+    for f in [pool.ex.submit(_ready) for _ in range(PROBE_WORKERS)]:
+        try: f.result(timeout=30)
+        except Exception: pass
+
+def _drop(pool: _Pool) -> None:
+    global _POOL
+    with _LOCK:
+        if _POOL is pool: _POOL = None
+    pool.close()
+
+def shutdown() -> None:
+    global _POOL
+    with _LOCK:
+        if _POOL is not None: _POOL.close()
+        _POOL = None
+
+atexit.register(shutdown)
+
+async def probe_search(cands: Sequence[str], words: Sequence[str], budget_ms: Optional[float] = None,
+                       floor: Optional[tuple] = None) -> Optional[Dict]:
+    """
+    Best guess over the whole dictionary for splitting `cands`, within a latency budget.
+    Returns the best result among the shards finished by the deadline (None if none finished).
+    `floor` = (candidate word, bits) the caller already has; a probe must beat it by PROBE_MIN_GAIN.
+    """
+    if np is None or len(cands) < 3 or not words or not ascii_words(words):
+        return None
+    t0 = time.perf_counter()
+    budget = (PROBE_BUDGET_MS if budget_ms is None else budget_ms) / 1000.0
+    pool = _POOL if _POOL is not None and _POOL.digest == words_digest(words) \
+        else await asyncio.to_thread(_pool_for, words)  # first call: shared memory + worker start-up
+    rows = [pool.row[w] for w in cands]
+    n = len(pool.words); shards = PROBE_WORKERS * _SHARDS_PER_WORKER
+    step = max(1, -(-n // shards))
+    try:
+        futs = [asyncio.wrap_future(pool.ex.submit(_score_shard, lo, min(n, lo + step), rows))
+                for lo in range(0, n, step)]
+    except BrokenProcessPool:
+        _drop(pool)  # a worker died; the next call starts a fresh pool
+        return None
+
+    best = (-1, -1.0, -1, -1.0); done_n = 0; pending = set(futs)
+    while pending:
+        left = budget - (time.perf_counter() - t0)
+        if left <= 0: break
+        done, pending = await asyncio.wait(pending, timeout=left, return_when=asyncio.FIRST_COMPLETED)
+        for f in done:
+            if f.cancelled() or f.exception() is not None: continue
+            r = f.result()
+            done_n += 1
+            if r[1] > best[1]: best = (r[0], r[1], best[2], best[3])
+            if r[3] > best[3]: best = (best[0], best[1], r[2], r[3])
+    for f in pending: f.cancel()  # also cancels the pool future if it has not started
+    if best[0] < 0: return None
+
+    word, bits, cand, cand_bits = pool.words[best[0]], best[1], None, best[3]
+    if best[2] >= 0: cand = pool.words[best[2]]
+    if floor and floor[1] > cand_bits: cand, cand_bits = floor
+    use_probe = cand is None or bits > cand_bits + PROBE_MIN_GAIN
+    return {"guess": word if use_probe else cand, "probe": use_probe and word not in set(cands),
+            "bits": round(bits if use_probe else cand_bits, 4), "shards": len(futs), "shards_done": done_n,
+            "ms": round((time.perf_counter() - t0) * 1000.0, 1)}
@@ -0,0 +1,158 @@
+# server/foundation/modules/wordle/simulate.py
+# Offline benchmark: play every dictionary word as the answer against one suggester, spread over
+# a process pool, and report the guess distribution, failure rate and per-turn latency as JSON.
+#   python -m server.foundation.modules.wordle.simulate --suggester suggest --heuristics h.json --out run.json
+import argparse, json, os, subprocess, sys, tempfile, time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .checker import get_dict, info_gain_scores
+from .candidates import candidates_for, invalidate
+from .parser import apply_marks
+from .patterns import ALL_GREEN, best_by_entropy, build_and_save, feedback, matrix_path, np, words_digest
+from . import opening, suggest
+
+MAX_TURNS = 6
+_CHUNK = 64
+
+def _fresh() -> Dict:
+    return {"greens": ["","","","",""], "yellows_not_here": [[],[],[],[],[]],
+            "must_include": [], "must_exclude": [], "min_counts": {}, "max_counts": {}}
+
+def marks_of(code: int) -> str:
+    """Feedback code → G/Y/B mark string."""
+    return "".join("BYG"[code // 3**i % 3] for i in range(5))
+
+# ---- suggesters: statebook → guess ----
+def _by_suggest(sb: Dict) -> Optional[str]:
+    return suggest.suggest(sb).get("guess")
+
+def _by_info_gain(sb: Dict) -> Optional[str]:
+    cands = candidates_for(sb)
+    if not cands: return None
+    ig = info_gain_scores(cands)
+    return cands[max(range(len(cands)), key=ig.__getitem__)]
+
+def _by_entropy(sb: Dict) -> Optional[str]:
+    cands = candidates_for(sb)
+    hit = best_by_entropy(cands, get_dict()) if cands else None
+    return hit[0] if hit else _by_info_gain(sb)
+
+SUGGESTERS: Dict[str, Callable[[Dict], Optional[str]]] = {
+    "suggest": _by_suggest,      # suggest.suggest (opening book + entropy/proxy + heuristics)
+    "entropy": _by_entropy,      # main._validated_suggestion fallback with the pattern matrix
+    "info_gain": _by_info_gain,  # main._validated_suggestion fallback without it
+}
+
+def play(answer: str, pick: Callable[[Dict], Optional[str]], max_turns: int = MAX_TURNS) -> Dict:
+    sb = {"project": {"id": "wordle"},
+          "state": {"constraints": _fresh(), "history": [], "_game": f"sim-{answer}"}}
+    guesses: List[str] = []; ms: List[float] = []; solved = False
+    for _ in range(max_turns):
+        t0 = time.perf_counter()
+        g = pick(sb)
+        ms.append((time.perf_counter() - t0) * 1000.0)
+        if not g: break
+        guesses.append(g)
+        code = feedback(g, answer)
+        if code == ALL_GREEN:
+            solved = True; break
+        apply_marks(sb, g, marks_of(code))
+    invalidate(sb)
+    return {"answer": answer, "solved": solved, "guesses": guesses, "ms": ms}
+
+# ---- process pool ----
+_W: Dict = {}
+
+def _use_heuristics(path: Optional[str]) -> None:
+    """Point the suggester at another heuristics file (and a private opening book for it)."""
+    if not path: return
+    suggest.HEUR_PATHS = [Path(path).resolve()]
+    opening.BOOK_PATH = Path(tempfile.gettempdir()) / f"wordle-book-{opening.heur_digest(suggest._load_heuristics())}.json"
+
+def _worker_init(name: str, heur_path: Optional[str], max_turns: int) -> None:
+    _use_heuristics(heur_path)
+    _W["pick"] = SUGGESTERS[name]; _W["max_turns"] = max_turns
+    get_dict()
+
+def _play_chunk(answers: List[str]) -> List[Dict]:
+    return [play(a, _W["pick"], _W["max_turns"]) for a in answers]
+
+def _prepare(name: str, words: Sequence[str]) -> None:
+    """Build shared artifacts once in the parent so workers never race to write them."""
+    if np is not None and name in ("suggest", "entropy") and not matrix_path(words).exists():
+        build_and_save(words)
+    if name == "suggest":
+        heur = suggest._load_heuristics()
+        book = opening.load_book()
+        if not book or (book.get("dict"), book.get("heur")) != (words_digest(words), opening.heur_digest(heur)):
+            book = opening.build_book(words, heur, suggest.rank_candidates)
+            if book: opening.save_book(book)
+
+def _pct(xs: List[float], q: float) -> float:
+    if not xs: return 0.0
+    return xs[min(len(xs) - 1, int(q * len(xs)))]
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, timeout=5).stdout.strip()
+    except Exception:
+        return ""
+
+def summarize(games: List[Dict], max_turns: int) -> Dict:
+    dist = {str(k): 0 for k in range(1, max_turns + 1)}; dist["fail"] = 0
+    for g in games:
+        dist[str(len(g["guesses"])) if g["solved"] else "fail"] += 1
+    solved = [len(g["guesses"]) for g in games if g["solved"]]
+    ms = sorted(t for g in games for t in g["ms"])
+    return {
+        "games": len(games), "solved": len(solved),
+        "fail_rate": round(dist["fail"] / max(1, len(games)), 5),
+        "mean_guesses": round(sum(solved) / max(1, len(solved)), 4),
+        "distribution": dist,
+        "latency_ms": {"turns": len(ms), "p50": round(_pct(ms, 0.50), 3), "p99": round(_pct(ms, 0.99), 3),
+                       "max": round(ms[-1], 3) if ms else 0.0, "mean": round(sum(ms) / max(1, len(ms)), 3)},
+        "failures": sorted(g["answer"] for g in games if not g["solved"])[:50],
+    }
+
+def run(name: str, heur_path: Optional[str] = None, limit: int = 0, workers: int = 0,
+        max_turns: int = MAX_TURNS) -> Dict:
+    _use_heuristics(heur_path)
+    words = get_dict()
+    answers = list(words)
+    if limit and limit < len(answers):  # evenly spaced sample, stable between runs
+        answers = [answers[i * len(answers) // limit] for i in range(limit)]
+    _prepare(name, words)
+    workers = workers or os.cpu_count() or 1
+    t0 = time.perf_counter()
+    chunks = [answers[i:i + _CHUNK] for i in range(0, len(answers), _CHUNK)]
+    games: List[Dict] = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init,
+                             initargs=(name, heur_path, max_turns)) as ex:
+        for part in ex.map(_play_chunk, chunks):
+            games.extend(part)
+    heur = suggest._load_heuristics()
+    return {"type": "wordle_sim", "suggester": name, "commit": _git_rev(),
+            "dict": words_digest(words), "heuristics": {"path": heur_path or "", "digest": opening.heur_digest(heur)},
+            "workers": workers, "max_turns": max_turns, "wall_s": round(time.perf_counter() - t0, 2),
+            **summarize(games, max_turns)}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Play every dictionary answer against a Wordle suggester.")
+    ap.add_argument("--suggester", choices=sorted(SUGGESTERS), default="suggest")
+    ap.add_argument("--heuristics", help="heuristics.json to use instead of the live one (suggest only)")
+    ap.add_argument("--limit", type=int, default=0, help="play an evenly spaced sample of N answers")
+    ap.add_argument("--workers", type=int, default=0, help="processes (default: all cores)")
+    ap.add_argument("--max-turns", type=int, default=MAX_TURNS)
+    ap.add_argument("--out", help="also write the JSON report here")
+    a = ap.parse_args(argv)
+    report = run(a.suggester, a.heuristics, a.limit, a.workers, a.max_turns)
+    text = json.dumps(report, indent=2)
+    if a.out: Path(a.out).write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,43 +1,129 @@
-# server/modules/wordle/suggest.py
+# server/foundation/modules/wordle/suggest.py
 import json
 from pathlib import Path
-from typing import Dict
-from .checkers import get_dict, filter_candidates, info_gain_score
+from typing import Dict, List, Optional, Sequence, Tuple
+from .checker import get_dict, get_index, info_gain_scores
+from .patterns import get_matrix
+from .candidates import candidates_for
+from .probe import probe_search
+from .opening import book_move
 
-def _load_heuristics() -> Dict:
-    p = Path(__file__).resolve().parent / "studies" / "heuristics.json"
-    if p.exists():
-        try: return json.loads(p.read_text(encoding="utf-8"))
-        except Exception: return {}
-    return {}
+try:
+    import numpy as np
+except Exception:
+    np = None
 
-def _letter_freq(cands):
-    from collections import Counter
-    cnt = Counter("".join(cands)) if cands else Counter()
-    total = sum(cnt.values()) or 1
-    return {ch: cnt[ch]/total for ch in cnt}
+# autolearn writes server/modules/<project>/studies; the in-package copy is a legacy location
+HEUR_PATHS = [
+    Path(__file__).resolve().parents[3] / "modules" / "wordle" / "studies" / "heuristics.json",
+    Path(__file__).resolve().parent / "studies" / "heuristics.json",
+]
+VOWELS = set("aeiou")
+ALPHABET = "abcdefghijklmnopqrstuvwxyz"
+
+# ---- heuristics.json, parsed once and reloaded only when its mtime changes ----
+_HEUR: Dict = {}
+_HEUR_KEY: Optional[Tuple[str, float]] = None
+
+def _load_heuristics() -> Dict:
+    global _HEUR, _HEUR_KEY
+    p = next((p for p in HEUR_PATHS if p.exists()), None)
+    if p is None:
+        _HEUR, _HEUR_KEY = {}, None
+        return _HEUR
+    key = (str(p), p.stat().st_mtime)
+    if key != _HEUR_KEY:
+        try: _HEUR = json.loads(p.read_text(encoding="utf-8-sig"))
+        except Exception: _HEUR = {}
+        _HEUR_KEY = key
+    return _HEUR
 
-def _heur_score(word: str, cands, heur: Dict, turn_idx: int) -> float:
-    rules = heur.get("rules", [])
-    freq = _letter_freq(cands)
-    vowels = set("aeiou")
-    uniq = len(set(word)) == len(word)
-    score = 0.0
-    for r in rules:
+def _rule_weights(heur: Dict, turn_idx: int) -> Tuple[float, float, float]:
+    """Rule list → weights for the (unique letters, two vowels, common letters) feature columns."""
+    w_uniq = w_vowels = w_common = 0.0
+    early = turn_idx <= 2
+    for r in heur.get("rules", []):
         rid = r.get("id",""); w = float(r.get("weight", 0))
         if rid == "avoid_duplicates_early":
-            if turn_idx <= 2 and uniq: score += w
+            if early: w_uniq += w
         elif rid == "prefer_common_letters":
-            score += sum(freq.get(ch,0) for ch in set(word)) * w
+            w_common += w
         elif rid == "prefer_two_vowels_early":
-            if turn_idx <= 2 and sum(1 for ch in set(word) if ch in vowels) >= 2:
-                score += w
+            if early: w_vowels += w
         # (extend with new ids safely)
-    return score
+    return w_uniq, w_vowels, w_common
 
-def suggest(sb: Dict) -> Dict:
+# ---- per-word feature columns, built once per dictionary index ----
+class _Features:
+    def __init__(self, words: Sequence[str]):
+        self.row = {w: i for i, w in enumerate(words)}
+        self.uniq = [1.0 if len(set(w)) == len(w) else 0.0 for w in words]
+        self.two_vowels = [1.0 if len(set(w) & VOWELS) >= 2 else 0.0 for w in words]
+        self.letters = [frozenset(w) for w in words]
+        if np is not None:
+            self.uniq = np.array(self.uniq); self.two_vowels = np.array(self.two_vowels)
+            col = {ch: j for j, ch in enumerate(ALPHABET)}
+            self.present = np.zeros((len(words), 26))  # distinct-letter mask
+            self.counts = np.zeros((len(words), 26))   # letter occurrences
+            for i, w in enumerate(words):
+                for ch in w:
+                    j = col.get(ch)
+                    if j is not None:
+                        self.present[i, j] = 1.0; self.counts[i, j] += 1.0
+
+_FEATS: Optional[_Features] = None
+_FEATS_INDEX = None
+
+def _features() -> _Features:
+    global _FEATS, _FEATS_INDEX
+    idx = get_index()
+    if _FEATS is None or _FEATS_INDEX is not idx:
+        _FEATS, _FEATS_INDEX = _Features(idx.words), idx
+    return _FEATS
+
+def _heur_scores(cands: List[str], heur: Dict, turn_idx: int) -> List[float]:
+    """Heuristic score of every candidate in one weighted sum over the feature columns."""
+    w_uniq, w_vowels, w_common = _rule_weights(heur, turn_idx)
+    f = _features()
+    if np is not None:
+        rows = np.fromiter((f.row[w] for w in cands), dtype=np.int64, count=len(cands))
+        totals = f.counts[rows].sum(axis=0)
+        freq = totals / (totals.sum() or 1.0)
+        s = w_uniq * f.uniq[rows] + w_vowels * f.two_vowels[rows] + w_common * (f.present[rows] @ freq)
+        return s.tolist()
+    cnt: Dict[str, int] = {}
+    for w in cands:
+        for ch in w: cnt[ch] = cnt.get(ch, 0) + 1
+    total = sum(cnt.values()) or 1
+    out = []
+    for w in cands:
+        i = f.row[w]
+        common = sum(cnt.get(ch, 0) for ch in f.letters[i]) / total
+        out.append(w_uniq*f.uniq[i] + w_vowels*f.two_vowels[i] + w_common*common)
+    return out
+
+def rank_candidates(cands: List[str], dictionary: List[str], heur: Dict, turn_idx: int):
+    """(best word, pattern matrix or None, info-gain column) for a non-empty candidate list."""
+    weights = heur.get("weights", {"info_gain":0.8,"heuristics":0.2})
+    # exact expected information (bits) when the feedback matrix is mapped; positional proxy otherwise
+    pm = get_matrix(dictionary)
+    if pm is not None:
+        rows = pm.rows_for(cands)
+        ig = pm.entropies(rows, rows).tolist()
+    else:
+        ig = info_gain_scores(cands)
+
+    # combine info gain with learned heuristics (bounded, safe)
+    wi = float(weights.get("info_gain",0.8)); wh = float(weights.get("heuristics",0.2))
+    h = _heur_scores(cands, heur, turn_idx)
+    total = [wi*a + wh*b for a, b in zip(ig, h)]
+    best = cands[max(range(len(cands)), key=total.__getitem__)]  # ties: first candidate wins
+    return best, pm, ig
+
+def _suggest(sb: Dict, probe: bool) -> Tuple[Dict, Optional[tuple]]:
+    """(result, probe inputs) — probe inputs are (cands, dictionary, floor) when a probe should run."""
     if sb.get("project",{}).get("id") != "wordle":
-        return {}
+        return {}, None
     cons = sb.get("state",{}).get("constraints", {
         "greens":["","","","",""],
         "yellows_not_here":[[],[],[],[],[]],
@@ -48,22 +134,37 @@ def suggest(sb: Dict) -> Dict:
     })
     turns = len(sb.get("state",{}).get("history", [])) + 1
     dictionary = get_dict()
-    cands = filter_candidates(cons, dictionary)
+    cands = candidates_for({"state": {**sb.get("state",{}), "constraints": cons}})
     if not cands:
-        return {"guess": None, "candidates": 0, "dict": len(dictionary)}
+        return {"guess": None, "candidates": 0, "dict": len(dictionary)}, None
 
     heur = _load_heuristics()
     weights = heur.get("weights", {"info_gain":0.8,"heuristics":0.2})
-    ig = {w: info_gain_score(w, cands) for w in cands}
+    if not probe:
+        booked = book_move(cands, dictionary, heur, turns, rank_candidates)
+        if booked:
+            return {"guess": booked, "candidates": len(cands), "dict": len(dictionary),
+                    "used":{"weights":weights, "scorer": "book"}}, None
+    best, pm, ig = rank_candidates(cands, dictionary, heur, turns)
+    out = {"guess": best, "candidates": len(cands), "dict": len(dictionary),
+           "used":{"weights":weights, "scorer": "entropy" if pm is not None else "proxy"}}
+    if not probe:
+        return out, None
+    top = max(range(len(cands)), key=ig.__getitem__)
+    floor = (cands[top], ig[top]) if pm is not None else None
+    return out, (cands, dictionary, floor)
 
-    # combine info gain with learned heuristics (bounded, safe)
-    scores = []
-    for w in cands:
-        h = _heur_score(w, cands, heur, turns)
-        s = float(weights.get("info_gain",0.8))*ig[w] + float(weights.get("heuristics",0.2))*h
-        scores.append((s, w))
+def suggest(sb: Dict) -> Dict:
+    """Best guess for the game in `sb` among the remaining candidates."""
+    return _suggest(sb, False)[0]
 
-    scores.sort(reverse=True)
-    best = scores[0][1]
-    return {"guess": best, "candidates": len(cands), "dict": len(dictionary), "used":{"weights":weights}}
-4
\ No newline at end of file
+async def suggest_async(sb: Dict, probe: bool = False, budget_ms: Optional[float] = None) -> Dict:
+    """suggest(); with probe=True non-candidate splitter words are considered too (awaits the probe pool)."""
+    out, todo = _suggest(sb, probe)
+    if todo:
+        cands, dictionary, floor = todo
+        pr = await probe_search(cands, dictionary, budget_ms, floor)
+        if pr and pr["probe"]:
+            out["guess"] = pr["guess"]
+        if pr: out["probe"] = pr
+    return out
@@ -0,0 +1,80 @@
+# Motif retrieval: motifs.jsonl is indexed once (and again only when the file changes) into an
+# inverted index (pattern key, value) -> motif rows; a signature is ranked by counting postings
+# for its own flattened (key, value) pairs, so lookup cost follows the matches, not the file.
+import heapq, json, threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+MOTIFS_PATH = Path(__file__).resolve().parent / "motifs.jsonl"
+MOTIF_TOP_K = 3
+
+def _norm_key(k: str) -> str:
+    return k[5:] if k.startswith("ssig.") else k  # pattern keys may be written "ssig.problem_type"
+
+def _pair(k: str, v) -> Tuple[str, str]:
+    return _norm_key(k), json.dumps(v, sort_keys=True)
+
+def flatten(sig: Dict, prefix: str = "") -> Dict[str, object]:
+    """{"feedback": {"mode": "symbolic"}} -> {"feedback.mode": "symbolic"} (dicts only; lists stay leaves)."""
+    out: Dict[str, object] = {}
+    for k, v in sig.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, dict): out.update(flatten(v, key + "."))
+        else: out[key] = v
+    return out
+
+class MotifIndex:
+    def __init__(self, motifs: List[Dict]):
+        self.motifs = motifs
+        self.sizes: List[int] = []
+        self.postings: Dict[Tuple[str, str], List[int]] = {}
+        for i, m in enumerate(motifs):
+            pat = m.get("pattern") or {}
+            self.sizes.append(len(pat))
+            for k, v in pat.items():
+                self.postings.setdefault(_pair(k, v), []).append(i)
+
+    @classmethod
+    def from_file(cls, path: Path) -> "MotifIndex":
+        motifs = []
+        if path.exists():
+            for ln in path.read_text(encoding="utf-8").splitlines():
+                ln = ln.strip()
+                if not ln: continue
+                try: m = json.loads(ln)
+                except Exception: continue
+                if isinstance(m, dict) and isinstance(m.get("pattern", {}), dict): motifs.append(m)
+        return cls(motifs)
+
+    def rank(self, ssig: Dict, k: int = MOTIF_TOP_K) -> List[Tuple[Dict, int]]:
+        """Top-k (motif, matched keys); more matched keys first, then the more specific pattern."""
+        hits: Dict[int, int] = {}
+        for key, v in flatten(ssig).items():
+            for i in self.postings.get(_pair(key, v), ()):
+                hits[i] = hits.get(i, 0) + 1
+        best = heapq.nsmallest(k, hits.items(), key=lambda kv: (-kv[1], -(kv[1] / (self.sizes[kv[0]] or 1)), kv[0]))
+        return [(self.motifs[i], n) for i, n in best[:k]]
+
+    def __len__(self) -> int:
+        return len(self.motifs)
+
+# ---- process-wide index, rebuilt when motifs.jsonl changes ----
+_INDEX: Optional[MotifIndex] = None
+_KEY = None
+_LOCK = threading.Lock()
+
+def get_index(path: Path = MOTIFS_PATH) -> MotifIndex:
+    global _INDEX, _KEY
+    st = path.stat() if path.exists() else None
+    key = (str(path), st.st_mtime_ns, st.st_size) if st else (str(path), None, None)
+    if _INDEX is None or key != _KEY:
+        with _LOCK:
+            if _INDEX is None or key != _KEY:
+                _INDEX, _KEY = MotifIndex.from_file(path), key
+    return _INDEX
+
+def relevant_motifs(ssig: Dict, k: int = MOTIF_TOP_K) -> List[Dict]:
+    """Prompt-sized form of the top-k motifs for a signature."""
+    return [{"motif_id": m.get("motif_id", ""), "recipe": m.get("recipe", ""),
+             "expected_esig": m.get("expected_esig", {}), "matched": n}
+            for m, n in get_index().rank(ssig, k)]
@@ -1,69 +1,206 @@
 import copy
-from typing import Dict, List, Any, Tuple
+from collections.abc import Mapping, Sequence
+from functools import lru_cache
+from typing import Dict, List, Tuple
 
 class PatchError(Exception):
     pass
 
+# ---------------- RFC-6902 engine (copy-on-write) ----------------
+# Ops never touch the input: containers along each written path are shallow-copied once per
+# patch and everything else is shared with the original, so cost follows the patch, not the
+# statebook, and a failing op just drops the partial copy (the caller still holds the original).
+
+def compile_path(path: str) -> Tuple[str, ...]:
+    """JSON pointer → token tuple ("/a/b~1c" → ("a", "b/c")); empty segments are ignored."""
+    if not isinstance(path, str):  # before the cache: an unhashable path (LLM output) is a PatchError too
+        raise PatchError(f"Bad path: {path!r}")
+    return _compile_path(path)
+
+@lru_cache(maxsize=4096)
+def _compile_path(path: str) -> Tuple[str, ...]:
+    return tuple(t.replace("~1", "/").replace("~0", "~") for t in path.split("/") if t)
+
+# ---------------- path policy (compiled trie) ----------------
+# allowed_paths / proof_required patterns: "/a/b" exact, "/a/*" anything below /a,
+# "/a/-" /a itself and anything below it (a list and its items)
+_EXACT, _BELOW, _SUBTREE = 1, 2, 4
+
+class _Node:
+    __slots__ = ("kids", "allow", "risky")
+    def __init__(self):
+        self.kids: Dict[str, "_Node"] = {}; self.allow = 0; self.risky = 0
+
+class PathPolicy:
+    """allowed_paths + proof_required compiled into one token trie; one walk answers both."""
+
+    def __init__(self, allowed: Tuple[str, ...], risky: Tuple[str, ...]):
+        self.root = _Node()
+        for pats, attr in ((allowed, "allow"), (risky, "risky")):
+            for pat in pats:
+                toks = compile_path(pat)
+                kind = _EXACT
+                if toks and toks[-1] == "*": toks, kind = toks[:-1], _BELOW
+                elif toks and toks[-1] == "-" and attr == "risky": toks, kind = toks[:-1], _SUBTREE
+                node = self.root
+                for t in toks: node = node.kids.setdefault(t, _Node())
+                setattr(node, attr, getattr(node, attr) | kind)
+
+    def check(self, toks: Tuple[str, ...]) -> Tuple[bool, bool]:
+        """(allowed, needs evidence) for one compiled path."""
+        node = self.root; allow = risky = False
+        for t in toks:
+            if node.allow & _BELOW: allow = True
+            if node.risky & (_BELOW | _SUBTREE): risky = True
+            node = node.kids.get(t)
+            if node is None: return allow, risky
+        if node.allow & _EXACT: allow = True
+        if node.risky & (_EXACT | _SUBTREE): risky = True
+        return allow, risky
+
+    def check_patch(self, patch: List[Dict]) -> Tuple[List[Tuple[int, str]], List[int]]:
+        """([(op index, path) not allowed], [op indexes that need evidence]) for a whole patch."""
+        denied: List[Tuple[int, str]] = []; proof: List[int] = []
+        for i, op in enumerate(patch):
+            act = op.get("op") if isinstance(op, dict) else None
+            if act == "test": continue  # read-only
+            paths = ([op.get("path")] + ([op.get("from")] if act == "move" else [])) if act else [None]
+            for path in paths:
+                allow, risky = self.check(compile_path(path)) if isinstance(path, str) else (False, False)
+                if not allow: denied.append((i, str(path)))
+                if risky and (not proof or proof[-1] != i): proof.append(i)
+        return denied, proof
+
+@lru_cache(maxsize=64)
+def _policy_for(allowed: Tuple[str, ...], risky: Tuple[str, ...]) -> PathPolicy:
+    return PathPolicy(allowed, risky)
+
+def compile_policy(policy: Dict) -> PathPolicy:
+    """Compiled trie for a kernel policy; cached on the pattern lists, so edits to the policy recompile."""
+    return _policy_for(tuple(policy.get("allowed_paths", [])),
+                       tuple(r.get("path", "") for r in policy.get("proof_required", [])))
+
 def _path_allowed(path: str, allowed_patterns: List[str]) -> bool:
-    # minimal matcher: "/state/*" style and exact
-    for pat in allowed_patterns:
-        if pat.endswith("/*"):
-            if path.startswith(pat[:-1]):
-                return True
-        elif path == pat:
-            return True
-    return False
-
-def _get(d: Dict, path: str):
-    node = d
-    if path == "/" or path == "":
-        return node
-    parts = [p for p in path.split("/") if p]
-    for p in parts:
-        if isinstance(node, list) and p.isdigit():
-            node = node[int(p)]
-        else:
-            node = node.get(p)
-    return node
-
-def _set(d: Dict, path: str, value: Any):
-    parts = [p for p in path.split("/") if p]
-    node = d
-    for i,p in enumerate(parts):
-        last = i==len(parts)-1
-        if isinstance(node, list) and p.isdigit():
-            idx = int(p)
-            if last:
-                node[idx] = value
-            else:
-                node = node[idx]
-        else:
-            if last:
-                node[p] = value
+    return _policy_for(tuple(allowed_patterns), ()).check(compile_path(path))[0]
+
+def _index(node: list, tok: str, insert: bool = False) -> int:
+    if not tok.isdigit():
+        raise PatchError(f"Bad list index: {tok}")
+    i = int(tok)
+    if i > len(node) or (i == len(node) and not insert):
+        raise PatchError(f"List index out of range: {tok}")
+    return i
+
+class _Txn:
+    def __init__(self, root: Dict):
+        self.root = dict(root)
+        self._owned = {id(self.root)}
+        self._keep = [self.root]  # holds every copy so its id() cannot be reused mid-patch
+
+    def _adopt(self, c):
+        self._owned.add(id(c)); self._keep.append(c)
+        return c
+
+    def _parent(self, toks: Tuple[str, ...], create: bool):
+        """Owned container holding toks[-1]; missing dict levels are created when `create`."""
+        node = self.root
+        for i, t in enumerate(toks[:-1]):
+            if isinstance(node, list):
+                k = _index(node, t); child = node[k]
             else:
-                if p not in node or not isinstance(node[p], (dict, list)):
-                    node[p] = {}
-                node = node[p]
-
-def _add_to_list(d: Dict, path: str, value: Any):
-    parts = [p for p in path.split("/") if p]
-    *pre, last = parts
-    node = d
-    for p in pre:
-        if isinstance(node, list) and p.isdigit():
-            node = node[int(p)]
+                k = t; child = node.get(t)
+            if not isinstance(child, (dict, list)):
+                if not create or isinstance(node, list):
+                    raise PatchError(f"Path not found: /{'/'.join(toks[:i+1])}")
+                nxt = toks[i+1]
+                child = node[k] = self._adopt([] if i == len(toks)-2 and (nxt == "-" or nxt.isdigit()) else {})
+            elif id(child) not in self._owned:
+                child = node[k] = self._adopt(dict(child) if isinstance(child, dict) else list(child))
+            node = child
+        return node
+
+    def get(self, toks: Tuple[str, ...]):
+        node = self.root
+        for t in toks:
+            if isinstance(node, list): node = node[_index(node, t)]
+            elif isinstance(node, dict) and t in node: node = node[t]
+            else: raise PatchError(f"Path not found: /{'/'.join(toks)}")
+        return node
+
+    def add(self, toks, value):
+        if not toks: raise PatchError("Cannot replace the statebook root")
+        parent, last = self._parent(toks, create=True), toks[-1]
+        if isinstance(parent, list):
+            if last == "-": parent.append(value)
+            else: parent.insert(_index(parent, last, insert=True), value)
         else:
-            node = node.setdefault(p, {})
-    if isinstance(node, list):
-        if last == "-":
-            node.append(value)
+            parent[last] = value
+
+    def replace(self, toks, value):
+        if not toks: raise PatchError("Cannot replace the statebook root")
+        parent, last = self._parent(toks, create=True), toks[-1]
+        if isinstance(parent, list): parent[_index(parent, last)] = value
+        else: parent[last] = value
+
+    def remove(self, toks):
+        if not toks: raise PatchError("Cannot remove the statebook root")
+        parent, last = self._parent(toks, create=False), toks[-1]
+        if isinstance(parent, list): return parent.pop(_index(parent, last))
+        if last not in parent: raise PatchError(f"Path not found: /{'/'.join(toks)}")
+        return parent.pop(last)
+
+def apply_patch(statebook: Dict, patch: List[Dict], check=None) -> Dict:
+    """
+    Apply RFC-6902 ops (add/replace/remove/move/copy/test) and return the new statebook.
+    `check(op, path_tokens, from_tokens)` may raise PatchError to veto an op. The input is never
+    modified, so any error leaves the caller with the untouched original (all-or-nothing).
+    """
+    tx = _Txn(statebook)
+    for op in patch:
+        if not isinstance(op, dict): raise PatchError(f"Bad op: {op!r}")
+        act = op.get("op"); toks = compile_path(op.get("path"))
+        frm = None
+        if act in ("move", "copy"):
+            if not isinstance(op.get("from"), str): raise PatchError(f"{act} needs a 'from' path: {op!r}")
+            frm = compile_path(op["from"])
+        if check: check(op, toks, frm)
+        if act == "add": tx.add(toks, op.get("value"))
+        elif act == "replace": tx.replace(toks, op.get("value"))
+        elif act == "remove": tx.remove(toks)
+        elif act == "test":
+            if tx.get(toks) != op.get("value"): raise PatchError(f"Test failed at {op.get('path')}")
+        elif act == "copy": tx.add(toks, copy.deepcopy(tx.get(frm)))
+        elif act == "move":
+            if toks[:len(frm)] == frm and len(toks) > len(frm):
+                raise PatchError(f"Cannot move {op.get('from')} into itself")
+            tx.add(toks, tx.remove(frm))
         else:
-            node.insert(int(last), value)
-    else:
-        # expect list at final path; create if absent
-        if last not in node or not isinstance(node[last], list):
-            node[last] = []
-        node[last].append(value)
+            raise PatchError(f"Unsupported op: {act}")
+    return tx.root
+
+# ---------------- read-only views for measurement ----------------
+class _ReadOnlyDict(Mapping):
+    __slots__ = ("_d",)
+    def __init__(self, d: Dict): self._d = d
+    def __getitem__(self, k): return readonly(self._d[k])
+    def __iter__(self): return iter(self._d)
+    def __len__(self): return len(self._d)
+    def __repr__(self): return f"readonly({self._d!r})"
+
+class _ReadOnlyList(Sequence):
+    __slots__ = ("_l",)
+    def __init__(self, l: list): self._l = l
+    def __getitem__(self, i):
+        return _ReadOnlyList(self._l[i]) if isinstance(i, slice) else readonly(self._l[i])
+    def __len__(self): return len(self._l)
+    def __eq__(self, other): return list(self) == (list(other) if isinstance(other, (list, Sequence)) else other)
+    def __repr__(self): return f"readonly({self._l!r})"
+
+def readonly(x):
+    """Zero-copy, recursively read-only view of a statebook (or any sub-tree)."""
+    if isinstance(x, dict): return _ReadOnlyDict(x)
+    if isinstance(x, list): return _ReadOnlyList(x)
+    return x
 
 def apply_with_evidence(statebook: Dict, proposal: Dict, policy: Dict, measure_fn) -> Tuple[Dict, List[str]]:
     """
@@ -71,50 +208,22 @@ def apply_with_evidence(statebook: Dict, proposal: Dict, policy: Dict, measure_f
     - allowed paths: policy['allowed_paths']
     - risky paths: policy['proof_required'] (requires evidence checker deltas)
     - measure_fn(sb) -> Dict[str,float] recomputes metrics
-    Returns: (new_statebook, notes)
+    Returns: (new_statebook, notes); new_statebook shares unmodified sub-trees with `statebook`
     """
     notes: List[str] = []
-    allowed = policy.get("allowed_paths", [])
-    proof_required = policy.get("proof_required", [])
-
     patch = proposal.get("patch", [])
     evidence = proposal.get("evidence", {})
+    if not isinstance(patch, list): raise PatchError("Patch must be a list of ops")
 
-    sb_new = copy.deepcopy(statebook)
-
-    risky_targets = [r.get("path","") for r in proof_required]
-
-    def requires_proof(path: str) -> bool:
-        for rt in risky_targets:
-            if rt.endswith("/*"):
-                if path.startswith(rt[:-1]):
-                    return True
-            elif rt.endswith("/-"):
-                if path.startswith(rt[:-2]):
-                    return True
-            elif path == rt:
-                return True
-        return False
-
-    before = measure_fn(copy.deepcopy(sb_new))
-
-    for op in patch:
-        act = op.get("op"); path = op.get("path"); value = op.get("value")
-        if not _path_allowed(path, allowed):
-            raise PatchError(f"Path not allowed: {path}")
-        if requires_proof(path) and not evidence:
-            raise PatchError(f"Evidence required for risky edit at {path}")
-        if act == "replace":
-            _set(sb_new, path, value)
-        elif act == "add":
-            if path.endswith("/-") or path.split("/")[-1].isdigit():
-                _add_to_list(sb_new, path, value)
-            else:
-                _set(sb_new, path, value)
-        else:
-            raise PatchError(f"Unsupported op: {act}")
+    denied, proof = compile_policy(policy).check_patch(patch)
+    if denied:
+        raise PatchError(f"Path not allowed: {denied[0][1]}")
+    if proof and not evidence:
+        raise PatchError(f"Evidence required for risky edit at {patch[proof[0]].get('path')}")
 
-    after = measure_fn(copy.deepcopy(sb_new))
+    before = measure_fn(readonly(statebook))
+    sb_new = apply_patch(statebook, patch)
+    after = measure_fn(readonly(sb_new))
 
     claimed = evidence.get("checker_deltas") if isinstance(evidence, dict) else None
     if claimed:
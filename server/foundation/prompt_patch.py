@@ -1,6 +1,9 @@
 import json
 from typing import Dict
 
+from .motif_index import relevant_motifs, MOTIF_TOP_K
+from .signatures import build_ssig
+
 INSTR = (
   "You are Peggy-Foundation. Reply ONLY with compact JSON: "
   '{"reply":"<short note to user>", "patch":[...], "evidence":{"checker_deltas":{...}}}. '
@@ -10,6 +13,16 @@ INSTR = (
   "If you don't know, set reply to \"I don't know yet\" and propose a probe in reply."
 )
 
+def _motifs_for(statebook: Dict, project_id: str) -> list:
+    """Indexed motifs matching the project's signature first, then the statebook's own, up to MOTIF_TOP_K."""
+    out = relevant_motifs(build_ssig(statebook, project_id))
+    seen = {m["motif_id"] for m in out}
+    for m in statebook.get("connections",{}).get("motifs",[]):
+        if len(out) >= MOTIF_TOP_K: break
+        mid = m.get("motif_id") if isinstance(m, dict) else m
+        if mid not in seen: out.append(m); seen.add(mid)
+    return out[:MOTIF_TOP_K]
+
 def assemble_patch_prompt(statebook: Dict, project_id: str, last_user: str = "", last_assistant: str = "") -> tuple[str, list]:
     kernel = statebook.get("kernel", {})
     body = {
@@ -23,7 +36,7 @@ def assemble_patch_prompt(statebook: Dict, project_id: str, last_user: str = "",
             "unknowns": statebook.get("state",{}).get("unknowns",[])[:2]
         },
         "principles": statebook.get("principles",{}).get("invariants",[])[:4],
-        "motifs": statebook.get("connections",{}).get("motifs",[])[:2],
+        "motifs": _motifs_for(statebook, project_id),
         "module": project_id or ""
     }
     sys = (
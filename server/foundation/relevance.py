@@ -0,0 +1,56 @@
+# Relevance gate for the foundation pass: a local check, run before the patch prompt is built,
+# that skips the model call on turns that cannot produce a patch (no project, nothing changed
+# in state since the last pass, no state key mentioned). Decisions are counted per reason.
+import hashlib, json, os, re
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+GATE_ON = os.getenv("FOUNDATION_GATE", "1").strip().lower() not in ("0", "false", "no")
+MAX_SESSIONS = 1024
+
+STATS: Dict[str, object] = {"checked": 0, "passed": 0, "skipped": 0, "reasons": {}}
+_SEEN: "OrderedDict[str, str]" = OrderedDict()   # session -> digest of `state` at the last pass
+
+def _state_digest(sb: Dict) -> str:
+    body = json.dumps(sb.get("state", {}), sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha1(body.encode("utf-8")).hexdigest()
+
+def _key_words(node, out: set) -> set:
+    """Words (5+ letters) of every key under node: "yellows_not_here" -> "yellows"."""
+    if isinstance(node, dict):
+        for k, v in node.items():
+            out.update(w for w in re.split(r"[^a-z]+", str(k).lower()) if len(w) >= 5)
+            _key_words(v, out)
+    return out
+
+def _mentions_state(sb: Dict, text: str) -> bool:
+    words = set(re.findall(r"[a-z]{5,}", text.lower()))
+    # keys inside state/project only: the wrapper names themselves ("state", "project") are common words
+    keys = _key_words(sb.get("state", {}), _key_words(sb.get("project", {}), set()))
+    return bool(words & keys)
+
+def remember(session_id: str, sb: Dict) -> None:
+    """Record the state a pass ended with, so only later changes count as a signal."""
+    _SEEN[session_id] = _state_digest(sb)
+    _SEEN.move_to_end(session_id)
+    while len(_SEEN) > MAX_SESSIONS: _SEEN.popitem(last=False)
+
+def check(sb: Dict, session_id: str, user_text: str, assistant_reply: str) -> Tuple[bool, str]:
+    """(run the pass?, reason)."""
+    STATS["checked"] += 1
+    project = sb.get("project", {}).get("id")
+    if not GATE_ON:
+        ok, reason = True, "gate_off"
+    elif project and _SEEN.get(session_id) != _state_digest(sb):
+        ok, reason = True, "state_changed"
+    elif _mentions_state(sb, f"{user_text}\n{assistant_reply}"):
+        ok, reason = True, "mentions_state"
+    else:
+        ok, reason = False, ("state_unchanged" if project else "no_project")
+    STATS["passed" if ok else "skipped"] += 1
+    STATS["reasons"][reason] = STATS["reasons"].get(reason, 0) + 1
+    return ok, reason
+
+def stats() -> Dict:
+    n = STATS["checked"] or 1
+    return {**STATS, "reasons": dict(STATS["reasons"]), "skip_rate": round(STATS["skipped"] / n, 3)}
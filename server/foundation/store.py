@@ -0,0 +1,191 @@
+# Statebook store: the document lives in memory; saves only mark it dirty and a debounce timer
+# writes it out off the event loop (temp file + rename, so a crash never leaves a torn file).
+# Contract: load() hands out the live document; whoever changes it must call save() afterwards.
+# A change that was never saved is caught when the store closes (logged, then written).
+import atexit, hashlib, json, logging, os, re, threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+FLUSH_S = float(os.getenv("STATEBOOK_FLUSH_MS", "500")) / 1000.0
+MAX_RESIDENT = int(os.getenv("STATEBOOK_RESIDENT", "128"))
+
+log = logging.getLogger(__name__)
+
+def atomic_write(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text); f.flush(); os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+class StatebookStore:
+    """One statebook file. load() returns the live document; every change to it must be followed
+    by save(), which marks it dirty and schedules the write."""
+
+    def __init__(self, path: Path, default: Callable[[], Dict], flush_s: float = FLUSH_S):
+        self.path, self.default, self.flush_s = path, default, flush_s
+        self._doc: Optional[Dict] = None
+        self._dirty = False
+        self._lock = threading.Lock()        # document, dirty flag, timer
+        self._write_lock = threading.Lock()  # one writer of this file at a time (timer vs close)
+        self._written: Optional[str] = None  # compact form last read from / written to disk
+        self._timer: Optional[threading.Timer] = None
+
+    def _read(self) -> Dict:
+        if self.path.exists():
+            try:
+                doc = json.loads(self.path.read_text(encoding="utf-8"))
+                self._written = json.dumps(doc, ensure_ascii=False)
+                return doc
+            except Exception: pass
+        doc = self.default()
+        self._written = json.dumps(doc, ensure_ascii=False)  # an untouched default needs no write
+        return doc
+
+    def load(self) -> Dict:
+        """The live document (disk is read once; later calls are a memory lookup)."""
+        doc = self._doc
+        if doc is None:
+            with self._lock:
+                if self._doc is None: self._doc = self._read()
+                doc = self._doc
+        return doc
+
+    def save(self, sb: Dict) -> None:
+        """Adopt `sb` as the document and schedule a write within flush_s."""
+        with self._lock:
+            self._doc = sb; self._dirty = True
+            if self._timer is None and self.flush_s > 0:
+                self._timer = threading.Timer(self.flush_s, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if self.flush_s <= 0: self.flush()
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def flush(self, unsaved: bool = False) -> bool:
+        """Write the document if dirty (or, with unsaved=True, if it differs from the file);
+        True when something was written."""
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel(); self._timer = None
+                if self._doc is None: return False
+                if not self._dirty and not unsaved: return False
+                # compact dump is a single C call, so it cannot interleave with a mutation on the loop;
+                # the indented copy for disk is then built from this private snapshot
+                snap = json.dumps(self._doc, ensure_ascii=False)
+                if not self._dirty:
+                    if snap == self._written: return False
+                    log.warning("statebook %s was changed without save(); writing it on close", self.path.name)
+                self._dirty = False
+            try:
+                atomic_write(self.path, json.dumps(json.loads(snap), ensure_ascii=False, indent=2))
+                self._written = snap
+            except Exception:
+                with self._lock: self._dirty = True  # retried by the next save or shutdown flush
+                raise
+        return True
+
+    def close(self) -> None:
+        try: self.flush(unsaved=True)
+        except Exception: pass
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_-]")
+
+def shard_name(session_id: str) -> str:
+    """Filesystem-safe shard file stem for a session id: the sanitized id plus a short hash of the
+    raw one, so ids that sanitize alike ("a b" and "a_b") keep separate files."""
+    sid = session_id or "default"
+    if sid == "default": return "default"
+    return f"{_UNSAFE.sub('_', sid)[:48]}-{hashlib.sha1(sid.encode('utf-8')).hexdigest()[:10]}"
+
+class ShardedStatebooks:
+    """One StatebookStore per session; an LRU keeps at most max_resident in memory and
+    evicting a shard flushes it, so a cold session is simply re-read from its file."""
+
+    def __init__(self, directory: Path, default_path: Path, seed: Callable[[Optional[Dict]], Dict],
+                 max_resident: int = MAX_RESIDENT, flush_s: float = FLUSH_S):
+        self.directory, self.default_path, self.seed = directory, default_path, seed
+        self.max_resident, self.flush_s = max(1, max_resident), flush_s
+        self._stores: "OrderedDict[str, StatebookStore]" = OrderedDict()
+        self._closing: Dict[str, StatebookStore] = {}  # evicted, flush still queued on _FLUSHER
+        self._lock = threading.Lock()
+
+    def path_for(self, session_id: str) -> Path:
+        return self._path(shard_name(session_id))
+
+    def _path(self, key: str) -> Path:
+        return self.default_path if key == "default" else self.directory / f"{key}.json"
+
+    def _adopt_legacy(self, session_id: str, path: Path) -> None:
+        """Shards used to be named by the sanitized id alone; an id that needed no sanitizing
+        cannot have collided, so its old file is moved to the new name."""
+        if path.exists() or _UNSAFE.search(session_id) or len(session_id) > 64: return
+        legacy = self.directory / f"{session_id}.json"
+        try:
+            if legacy.exists(): os.replace(legacy, path)
+        except OSError: pass
+
+    def store(self, session_id: str = "default") -> StatebookStore:
+        key = shard_name(session_id)
+        with self._lock:
+            st = self._stores.get(key)
+            if st is not None:
+                self._stores.move_to_end(key)
+                return st
+            st = self._closing.pop(key, None)  # evicted, but its document is still the current one
+        if st is None:
+            if key == "default":
+                factory = lambda: self.seed(None)
+            else:  # a brand-new session starts from the shared kernel/policy of the default statebook
+                factory = lambda: self.seed(self.store("default").load())
+            path = self._path(key)
+            if key != "default": self._adopt_legacy(session_id, path)
+            st = StatebookStore(path, factory, self.flush_s)
+        evicted = []
+        with self._lock:
+            st = self._stores.setdefault(key, st)
+            self._stores.move_to_end(key)
+            while len(self._stores) > self.max_resident:
+                k, old = self._stores.popitem(last=False)
+                self._closing[k] = old; evicted.append((k, old))
+        for k, old in evicted:  # the write happens on the flush thread, not the caller's (event loop)
+            try: _FLUSHER.submit(self._retire, k, old)
+            except RuntimeError: self._retire(k, old)  # interpreter shutting down
+        return st
+
+    def _retire(self, key: str, st: StatebookStore) -> None:
+        st.close()
+        with self._lock:
+            if self._closing.get(key) is st: del self._closing[key]
+
+    def load(self, session_id: str = "default") -> Dict:
+        return self.store(session_id).load()
+
+    def save(self, sb: Dict, session_id: str = "default") -> None:
+        self.store(session_id).save(sb)
+
+    def resident(self) -> int:
+        return len(self._stores)
+
+    def close(self) -> None:
+        with self._lock: stores = list(self._stores.values()) + list(self._closing.values())
+        for st in stores: st.close()
+
+_FLUSHER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="statebook-flush")
+_STORES = []
+
+def register(store):
+    """Flush `store` (anything with close()) at shutdown."""
+    _STORES.append(store)
+    return store
+
+def flush_all() -> None:
+    for s in list(_STORES): s.close()
+
+atexit.register(flush_all)
@@ -20,8 +20,35 @@ def rule_ids(heur):
             ids.append(rid.strip().lower())
     return set(ids)
 
-def link_all(modules_dir="server/modules"):
-    ledger = load_json(LEDGER)
+class XLinkIndex:
+    """rule id -> topics inverted index; adding a topic only looks at topics sharing one of its ids."""
+
+    def __init__(self, xlinks=()):
+        self.by_rule = {}      # rule id -> set(topic)
+        self.rules = {}        # topic -> set(rule id)
+        self.pairs = {(x["a"], x["b"]) for x in xlinks}
+
+    def add_topic(self, topic, ids):
+        """Index `topic`; returns the xlink entries it creates against topics already indexed."""
+        ids = set(ids) - self.rules.get(topic, set())
+        self.rules.setdefault(topic, set()).update(ids)
+        touched = set()
+        for rid in ids:
+            peers = self.by_rule.setdefault(rid, set())
+            touched |= peers
+            peers.add(topic)
+        out = []
+        for other in sorted(touched - {topic}):
+            a, b = sorted((topic, other))
+            if (a, b) in self.pairs:
+                continue
+            shared = self.rules[a] & self.rules[b]
+            self.pairs.add((a, b))
+            out.append({"a": a, "b": b, "why": f"shared heuristic(s): {', '.join(sorted(shared))}"})
+        return out
+
+def topic_rules(modules_dir="server/modules"):
+    """{topic: rule ids} for every server/modules/<topic>/studies/heuristics.json (templates skipped)."""
     topics = {}
     for root, dirs, files in os.walk(modules_dir):
         if os.path.basename(root) != "studies" or "heuristics.json" not in files:
@@ -31,27 +58,21 @@ def link_all(modules_dir="server/modules"):
         topic = parts[-2]
         if topic.startswith("_"):  # skip templates like _templates
             continue
-        heur = load_json(os.path.join(root, "heuristics.json"))
-        ids = rule_ids(heur)
-        if not ids:
-            continue
-        topics[topic] = ids
-
-    existing = {(x["a"], x["b"]) for x in ledger.get("xlinks", [])}
-    added = 0
-    names = sorted(topics.keys())
-    for i in range(len(names)):
-        for j in range(i+1, len(names)):
-            a, b = names[i], names[j]
-            shared = topics[a] & topics[b]
-            if not shared or (a, b) in existing:
-                continue
-            why = f"shared heuristic(s): {', '.join(sorted(shared))}"
-            ledger.setdefault("xlinks", []).append({"a": a, "b": b, "why": why})
-            added += 1
+        ids = rule_ids(load_json(os.path.join(root, "heuristics.json")))
+        if ids:
+            topics[topic] = ids
+    return topics
+
+def link_all(modules_dir="server/modules"):
+    ledger = load_json(LEDGER)
+    index = XLinkIndex(ledger.get("xlinks", []))
+    added = []
+    for topic, ids in sorted(topic_rules(modules_dir).items()):
+        added += index.add_topic(topic, ids)
     if added:
+        ledger.setdefault("xlinks", []).extend(added)
         save_json(LEDGER, ledger)
-    return added
+    return len(added)
 
 if __name__ == "__main__":
     print(json.dumps({"type": "xlinks", "added": link_all(), "examples": []}))
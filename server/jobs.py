@@ -0,0 +1,80 @@
+# JOBS_V1 — in-process async job queue for post-stream bookkeeping (foundation pass, summaries)
+# Bounded workers; a job submitted under a key that is still waiting replaces the waiting one
+# (coalescing), each run is capped by a timeout, and stats() exposes depth for /jobs.
+import asyncio, os, time
+from typing import Awaitable, Callable, Dict, Optional
+
+from .history import log_event
+
+JOB_WORKERS   = int(os.getenv("JOB_WORKERS", "4"))
+JOB_TIMEOUT_S = float(os.getenv("JOB_TIMEOUT_S", "60"))
+
+JobFn = Callable[[], Awaitable[None]]
+
+class JobQueue:
+    def __init__(self, workers: int = JOB_WORKERS, timeout_s: float = JOB_TIMEOUT_S):
+        self.workers, self.timeout_s = max(1, workers), timeout_s
+        self._pending: Dict[str, tuple] = {}   # key -> (fn, timeout, submitted_at), waiting to run
+        self._order: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._running = 0
+        self._active = set()                   # keys running now; a resubmit waits for them
+        self.counts = {"submitted": 0, "coalesced": 0, "done": 0, "failed": 0, "timeouts": 0}
+
+    def start(self) -> None:
+        if self._tasks: return
+        self._order = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, drain_s: float = 5.0) -> None:
+        """Give queued jobs up to drain_s to finish, then cancel the workers."""
+        if not self._tasks: return
+        end = time.monotonic() + drain_s
+        while (self._pending or self._running) and time.monotonic() < end:
+            await asyncio.sleep(0.05)
+        for t in self._tasks: t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, key: str, fn: JobFn, timeout_s: Optional[float] = None) -> bool:
+        """Queue fn under key; False when it replaced a job with the same key that had not started."""
+        if not self._tasks: self.start()
+        self.counts["submitted"] += 1
+        coalesced = key in self._pending
+        self._pending[key] = (fn, timeout_s or self.timeout_s, time.monotonic())
+        if coalesced:
+            self.counts["coalesced"] += 1
+            return False
+        if key not in self._active:  # otherwise queued when the running job with this key ends
+            self._order.put_nowait(key)
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            key = await self._order.get()
+            job = self._pending.pop(key, None)
+            if job is None: continue
+            fn, timeout_s, _ = job
+            self._running += 1; self._active.add(key)
+            try:
+                await asyncio.wait_for(fn(), timeout=timeout_s)
+                self.counts["done"] += 1
+            except asyncio.TimeoutError:
+                self.counts["timeouts"] += 1
+                log_event({"dir":"job","key":key,"error":f"timeout after {timeout_s}s"})
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.counts["failed"] += 1
+                log_event({"dir":"job","key":key,"error":f"{type(e).__name__}: {e}"})
+            finally:
+                self._running -= 1; self._active.discard(key)
+                if key in self._pending: self._order.put_nowait(key)
+
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        oldest = max((now - t for _, _, t in self._pending.values()), default=0.0)
+        return {"depth": len(self._pending), "running": self._running, "workers": self.workers,
+                "oldest_wait_s": round(oldest, 3), **self.counts}
+
+JOBS = JobQueue()
@@ -0,0 +1,81 @@
+# LLM_CACHE_V1 — response cache for deterministic side calls (foundation, summarizer, autolearn).
+# Keyed by sha256 of (model, messages, params); an LRU in memory with a TTL, plus an optional
+# directory tier (one JSON file per key) that survives restarts. Counters are exposed by stats().
+import hashlib, json, os, time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+LLM_CACHE_MAX   = int(os.getenv("LLM_CACHE_MAX", "512"))
+LLM_CACHE_TTL_S = float(os.getenv("LLM_CACHE_TTL_S", "3600"))
+LLM_CACHE_DIR   = os.getenv("LLM_CACHE_DIR", "").strip()   # empty: memory only
+
+def cache_key(model: str, messages: List[Dict], params: Dict) -> str:
+    body = json.dumps([model, messages, params], sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    def __init__(self, max_entries: int = LLM_CACHE_MAX, ttl_s: float = LLM_CACHE_TTL_S,
+                 disk_dir: Optional[Path] = None):
+        """ttl_s <= 0 keeps entries until evicted; disk_dir adds the file tier."""
+        self.max_entries, self.ttl_s = max(1, max_entries), ttl_s
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._mem: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.counts = {"hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "stores": 0}
+
+    def _fresh(self, ts: float) -> bool:
+        return self.ttl_s <= 0 or time.time() - ts < self.ttl_s
+
+    def _read_disk(self, key: str) -> Optional[Tuple[float, str]]:
+        if self.disk_dir is None: return None
+        try:
+            obj = json.loads((self.disk_dir / f"{key}.json").read_text(encoding="utf-8"))
+            return float(obj["ts"]), str(obj["content"])
+        except Exception:
+            return None
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.get_entry(key)
+        return entry[1] if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[Tuple[float, str]]:
+        """(stored-at epoch seconds, content), or None on a miss; counted like get()."""
+        entry, tier = self._mem.get(key), "hits"
+        if entry is None:
+            entry, tier = self._read_disk(key), "disk_hits"
+        if entry is not None and not self._fresh(entry[0]):
+            self.counts["expired"] += 1
+            self._mem.pop(key, None)
+            entry = None
+        if entry is None:
+            self.counts["misses"] += 1
+            return None
+        self.counts[tier] += 1
+        self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: str, entry: Tuple[float, str]) -> None:
+        self._mem[key] = entry
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries: self._mem.popitem(last=False)
+
+    def put(self, key: str, content: str) -> None:
+        entry = (time.time(), content)
+        self._remember(key, entry)
+        self.counts["stores"] += 1
+        if self.disk_dir is None: return
+        try:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.disk_dir / f".{key}.{os.getpid()}.tmp"
+            tmp.write_text(json.dumps({"ts": entry[0], "content": content}, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.disk_dir / f"{key}.json")
+        except Exception:
+            pass  # the memory tier still serves this process
+
+    def stats(self) -> Dict:
+        looked = self.counts["hits"] + self.counts["disk_hits"] + self.counts["misses"]
+        return {**self.counts, "size": len(self._mem), "max": self.max_entries, "ttl_s": self.ttl_s,
+                "disk": str(self.disk_dir) if self.disk_dir else None,
+                "hit_rate": round((looked - self.counts["misses"]) / looked, 3) if looked else 0.0}
+
+RESPONSES = ResponseCache(disk_dir=Path(LLM_CACHE_DIR) if LLM_CACHE_DIR else None)
@@ -1,25 +1,90 @@
-# LLM_PROVIDER_V1
-import os
-from typing import AsyncGenerator, List, Dict, Any
+# LLM_PROVIDER_V2 — one long-lived AsyncOpenAI client per process (shared connection pool,
+# keep-alive, HTTP/2 when the h2 package is installed); every call site goes through get_client().
+# LLM_BACKEND=fake swaps in the local stand-in from fake_llm (no network, production-like timing).
+import os, json, importlib.util
+from typing import AsyncGenerator, List, Dict, Any, Optional
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
+
+from .llm_cache import ResponseCache, cache_key
+
+try:
+    import httpx
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+except Exception:
+    AsyncOpenAI = None
 
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 OPENAI_MODEL   = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+LLM_BACKEND    = os.getenv("LLM_BACKEND", "openai").strip().lower()
+
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+LLM_MAX_KEEPALIVE   = int(os.getenv("LLM_MAX_KEEPALIVE", "16"))
+LLM_KEEPALIVE_S     = float(os.getenv("LLM_KEEPALIVE_S", "60"))
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "1").strip().lower() not in ("0", "false", "no") \
+            and importlib.util.find_spec("h2") is not None
+
+_CLIENT: Optional["AsyncOpenAI"] = None
+
+def get_client() -> Optional["AsyncOpenAI"]:
+    """The shared client, built on first use; None without an API key or the openai package."""
+    global _CLIENT
+    if _CLIENT is None and LLM_BACKEND == "fake":
+        from .fake_llm import FakeAsyncClient
+        _CLIENT = FakeAsyncClient()
+    if _CLIENT is None:
+        api_key = os.getenv("OPENAI_API_KEY", "").strip()
+        if not api_key or AsyncOpenAI is None:
+            return None
+        http = DefaultAsyncHttpxClient(  # keeps the SDK's default timeouts/redirects
+            http2=LLM_HTTP2,
+            limits=httpx.Limits(max_connections=LLM_MAX_CONNECTIONS,
+                                max_keepalive_connections=LLM_MAX_KEEPALIVE,
+                                keepalive_expiry=LLM_KEEPALIVE_S),
+        )
+        _CLIENT = AsyncOpenAI(api_key=api_key, http_client=http)
+    return _CLIENT
+
+async def aclose() -> None:
+    """Close the pool (FastAPI lifespan shutdown); a later get_client() builds a fresh one."""
+    global _CLIENT
+    client, _CLIENT = _CLIENT, None
+    if client is not None:
+        await client.close()
+
+async def complete(messages: List[Dict[str, Any]], model: Optional[str] = None,
+                   cache: Optional[ResponseCache] = None, accept=None, client=None, **params) -> tuple:
+    """One non-streamed completion -> (content, cached). With `cache`, an identical (model, messages,
+    params) request is answered from it; a fresh answer is stored only if accept(content) holds."""
+    model = model or OPENAI_MODEL
+    key = cache_key(model, messages, params) if cache is not None else None
+    if key is not None:
+        hit = cache.get(key)
+        if hit is not None: return hit, True
+    client = client or get_client()
+    if client is None:
+        raise RuntimeError("no_api_or_lib")
+    resp = await client.chat.completions.create(model=model, messages=messages, **params)
+    content = (resp.choices[0].message.content or "").strip()
+    if key is not None and content and (accept is None or accept(content)):
+        cache.put(key, content)
+    return content, False
+
+def parses_as_json(s: str) -> bool:
+    try: json.loads(s); return True
+    except Exception: return False
 
 async def stream_response(messages: List[Dict[str, Any]]) -> AsyncGenerator[str, None]:
     """
     Streams tokens from OpenAI Chat Completions.
-    Falls back to echo-mode if no API key is present.
+    Falls back to echo-mode if no API key is present (and the fake backend is not selected).
     """
-    if not OPENAI_API_KEY:
+    client = get_client()
+    if client is None:
         user_last = next((m["content"] for m in reversed(messages) if m["role"]=="user"), "")
         yield f"(echo) {user_last}"
         return
 
-    client = AsyncOpenAI(api_key=OPENAI_API_KEY)
-
     stream = await client.chat.completions.create(
         model=OPENAI_MODEL,
         messages=messages,
@@ -1,19 +1,39 @@
 # MAIN_EXP_MEM_V4 — memory + bandit + foundation + Wordle modules + autolearn
-import os, json, uuid, re
+import asyncio, copy, os, json, uuid, re
+from contextlib import asynccontextmanager
 from typing import Dict, List, Optional
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 
 from .auth import require_bearer
-from .llm_provider import stream_response
+from .llm_provider import stream_response, aclose as close_llm_client
+from .llm_cache import RESPONSES
 from .history import log_event
 from .svec import build_svec, bucketize_svec
 from .policy import choose, update, addon_for
-from .memory import SessionMemory
+from .memory import SessionMemory, session_lock
+from .jobs import JOBS
+from .prompt_budget import assemble_chat
+from .coalesce import FlushPolicy, coalesce
 
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-app = FastAPI(title="peggy-ws")
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    if _WORDLE_CHECKERS_OK:
+        get_index()  # map dictionary.bin and build the bitset index before the first message
+        if _WORDLE_PROBE and _wordle_probe_warm:
+            await asyncio.to_thread(_wordle_probe_warm, get_dict())  # probe workers up before the first turn
+    if _FOUNDATION:
+        get_motif_index()  # index motifs.jsonl once; later lookups only re-stat the file
+    JOBS.start()
+    yield
+    await JOBS.stop()
+    await close_llm_client()  # after the queue drains: its jobs may still be calling the model
+    flush_statebook()  # write-behind statebook: persist whatever is still dirty
+
+app = FastAPI(title="peggy-ws", lifespan=_lifespan)
 app.mount("/app", StaticFiles(directory="client", html=True), name="app")
 
 @app.get("/", response_class=HTMLResponse)
@@ -22,35 +42,48 @@ def home():
 
 # ---------------- Foundation bridge (safe fallbacks) ----------------
 try:
-    from .foundation.bridge import propose_and_apply_patch, load_statebook, save_statebook
+    from .foundation.bridge import propose_and_apply_patch, load_statebook, save_statebook, flush_statebook
+    from .foundation.motif_index import get_index as get_motif_index
+    from .foundation.relevance import stats as _gate_stats
     _FOUNDATION = True
 except Exception:
     _FOUNDATION = False
-    def load_statebook() -> Dict: return {}
-    def save_statebook(sb: Dict) -> None: pass
+    _gate_stats = None
+    def load_statebook(session_id: str = "default") -> Dict: return {}
+    def save_statebook(sb: Dict, session_id: str = "default") -> None: pass
+    def flush_statebook() -> None: pass
     async def propose_and_apply_patch(**kwargs) -> Dict:
         return {"applied": False, "error": "no_foundation", "notes": [], "raw": None, "project_id": ""}
 
+# metrics for evidence checks (modules register theirs on import, e.g. wordle candidate_count)
+try:
+    from .foundation.metrics import measure as _measure_metrics
+except Exception:
+    _measure_metrics = None
+
 # ---------------- Autolearn (self-study) ----------------
+AUTOLEARN_TIMEOUT_S = float(os.getenv("AUTOLEARN_TIMEOUT_S", "300"))  # whole batch, run as a background job
 try:
-    from .foundation.autolearn import run_autolearn
+    from .foundation.autolearn import run_autolearn, run_batch as run_autolearn_batch
     _AUTOLEARN = True
 except Exception:
     _AUTOLEARN = False
     async def run_autolearn(project_id: str, sb: Dict) -> Dict:
         return {"project": project_id, "applied": False, "files": [], "error": "no_autolearn", "notes": []}
+    async def run_autolearn_batch(projects: List[str], sb: Dict, on_progress=None, refresh=()) -> List[Dict]:
+        return [await run_autolearn(p, sb) for p in projects]
 
 # ---------------- Wordle modules (prefer your module files; fallback to light in-file logic) ----------------
 # checkers (dictionary + legality + info gain)
 _WORDLE_CHECKERS_OK = False
 try:
     # Preferred new path (you created server/foundation/modules/wordle/checker.py)
-    from .foundation.modules.wordle.checker import get_dict, dict_len, filter_candidates, info_gain_score
+    from .foundation.modules.wordle.checker import get_dict, dict_len, filter_candidates, info_gain_scores, get_index
     _WORDLE_CHECKERS_OK = True
 except Exception:
     try:
         # Older path we used before
-        from .foundation.checkers.wordle_checkers import get_dict, dict_len, filter_candidates, info_gain_score
+        from .foundation.checkers.wordle_checkers import get_dict, dict_len, filter_candidates, info_gain_scores, get_index
         _WORDLE_CHECKERS_OK = True
     except Exception:
         # Minimal fallbacks so the server never crashes; dict will be 0 if you don't have a dictionary file.
@@ -58,25 +91,48 @@ except Exception:
         def get_dict() -> List[str]: return []
         def dict_len() -> int: return 0
         def filter_candidates(cons: Dict, dictionary=None) -> List[str]: return []
-        def info_gain_score(w: str, cands: List[str]) -> float: return 0.0
+        def info_gain_scores(cands: List[str]) -> List[float]: return [0.0]*len(cands)
+        def get_index(): return None
 
-# parser (plain-English → constraints)
+# per-game candidate cache (incremental narrowing as constraints tighten)
+try:
+    from .foundation.modules.wordle import candidates as _wordle_cands
+except Exception:
+    _wordle_cands = None
+
+# exact expected-entropy scoring (needs numpy + the precomputed feedback matrix)
+_wordle_best_by_entropy = None
+try:
+    from .foundation.modules.wordle.patterns import best_by_entropy as _wordle_best_by_entropy  # type: ignore
+except Exception:
+    _wordle_best_by_entropy = None
+
+# probe search over the full dictionary (process pool, latency-bounded)
+_WORDLE_PROBE = os.getenv("WORDLE_PROBE", "").strip().lower() in ("1", "true", "yes")
+_WORDLE_HARD  = os.getenv("WORDLE_HARD", "").strip().lower() in ("1", "true", "yes")  # marks: guesses must fit earlier marks
+try:
+    from .foundation.modules.wordle.probe import probe_search as _wordle_probe_search, warm as _wordle_probe_warm  # type: ignore
+except Exception:
+    _wordle_probe_search = _wordle_probe_warm = None
+
+# parser (plain-English → constraints; apply_marks for structured G/Y/B feedback)
 _wordle_apply_from_nl = None
+_wordle_apply_marks = None
 try:
-    # If you have server/foundation/modules/wordle/parser.py with an apply(...) function
-    from .foundation.modules.wordle.parser import apply as _wordle_apply_from_nl  # type: ignore
+    from .foundation.modules.wordle import parser as _wordle_parser  # type: ignore
+    # apply_from_nl is the module's entry point; apply / apply_feedback_from_nl are older names
+    for _name in ("apply_from_nl", "apply", "apply_feedback_from_nl"):
+        if callable(getattr(_wordle_parser, _name, None)):
+            _wordle_apply_from_nl = getattr(_wordle_parser, _name); break
+    _wordle_apply_marks = getattr(_wordle_parser, "apply_marks", None)
 except Exception:
-    try:
-        # alternative name some folks prefer
-        from .foundation.modules.wordle.parser import apply_feedback_from_nl as _wordle_apply_from_nl  # type: ignore
-    except Exception:
-        _wordle_apply_from_nl = None
+    _wordle_apply_from_nl = None
 
 # suggester (can blend heuristics learned by autolearn)
 _wordle_suggest_func = None
 try:
-    # If you have server/foundation/modules/wordle/suggest.py with suggest(sb) → {guess,candidates,dict?,used?}
-    from .foundation.modules.wordle.suggest import suggest as _wordle_suggest_func  # type: ignore
+    # If you have server/foundation/modules/wordle/suggest.py with suggest_async(sb, probe) → {guess,candidates,dict?,used?}
+    from .foundation.modules.wordle.suggest import suggest_async as _wordle_suggest_func  # type: ignore
 except Exception:
     _wordle_suggest_func = None
 
@@ -90,21 +146,28 @@ _DEFAULT = {
     "min_counts": {},
     "max_counts": {}
 }
-def _ensure_bootstrap(sb: Dict) -> None:
+def _ensure_bootstrap(sb: Dict) -> bool:
+    """Fill in missing Wordle fields; True if anything was added (the caller must then save)."""
+    size = lambda: (len(sb), len(sb.get("project",{})), len(sb.get("state",{})))
+    before = size()
     sb.setdefault("project",{}); sb.setdefault("state",{})
-    if sb["project"].get("id")!="wordle": return
+    if sb["project"].get("id")!="wordle": return size() != before
     sb["project"].setdefault("goal","Solve today's Wordle in ≤ 4 guesses.")
     sb["project"].setdefault("deliverable","Legal 5-letter guesses until solved.")
     sb["project"].setdefault("success_checks",["valid_word","respects_constraints","novel_guess"])
-    sb["state"].setdefault("constraints",{k:(v.copy() if isinstance(v,list) else v) for k,v in _DEFAULT.items()})
+    sb["state"].setdefault("constraints",copy.deepcopy(_DEFAULT))
     sb["state"].setdefault("history",[])
     sb["state"].setdefault("_last_guess","")
+    if _wordle_cands: sb["state"].setdefault("_game", _wordle_cands.new_game_id())
+    return size() != before
 
 def _reset(sb: Dict) -> None:
     sb.setdefault("state",{})
-    sb["state"]["constraints"] = {k:(v.copy() if isinstance(v,list) else v) for k,v in _DEFAULT.items()}
+    if _wordle_cands: _wordle_cands.invalidate(sb)
+    sb["state"]["constraints"] = copy.deepcopy(_DEFAULT)
     sb["state"]["history"] = []
     sb["state"]["_last_guess"] = ""
+    if _wordle_cands: sb["state"]["_game"] = _wordle_cands.new_game_id()
 
 def _constraints_block(sb: Dict) -> str:
     if sb.get("project",{}).get("id")!="wordle": return ""
@@ -273,20 +336,23 @@ def _apply_from_nl(sb: Dict, user_text: str) -> bool:
             log_event({"dir":"module","note":"parser_error","error":str(e)})
     return _apply_from_nl_fallback(sb, user_text)
 
-def _validated_suggestion(sb: Dict) -> Dict:
-    """Prefer external suggester; otherwise use checkers+info gain."""
+async def _validated_suggestion(sb: Dict, probe: bool = False) -> Dict:
+    """Prefer external suggester; otherwise use checkers + entropy (info-gain proxy until the matrix exists).
+    probe=True also considers non-candidate splitter words, within WORDLE_PROBE_MS."""
     # try your modules/wordle/suggest.py first
     if _wordle_suggest_func:
         try:
-            out = _wordle_suggest_func(sb)  # type: ignore
+            out = await _wordle_suggest_func(sb, probe=probe)  # type: ignore
             if isinstance(out, dict):
                 # normalize keys we care about
-                return {
+                res = {
                     "guess": out.get("guess"),
                     "candidates": int(out.get("candidates", 0)),
                     "dict": int(out.get("dict", dict_len() if _WORDLE_CHECKERS_OK else 0)),
                     "used": out.get("used")
                 }
+                if out.get("probe"): res["probe"] = out["probe"]
+                return res
         except Exception as e:
             log_event({"dir":"module","note":"suggest_error","error":str(e)})
 
@@ -296,11 +362,142 @@ def _validated_suggestion(sb: Dict) -> Dict:
 
     cons = sb["state"]["constraints"]
     dictionary = get_dict()
-    cands = filter_candidates(cons, dictionary)
+    index = get_index()
+    cands = _wordle_cands.narrow(_wordle_cands.game_key(sb), cons, index) if (_wordle_cands and index is not None) \
+        else filter_candidates(cons, dictionary)
     if not cands:
         return {"guess": None, "candidates": 0, "dict": len(dictionary)}
-    best = max(cands, key=lambda w: info_gain_score(w, cands))
-    return {"guess": best, "candidates": len(cands), "dict": len(dictionary)}
+    best = None; hit = None
+    if _wordle_best_by_entropy:
+        try:
+            hit = _wordle_best_by_entropy(cands, dictionary)  # type: ignore
+            best = hit[0] if hit else None
+        except Exception as e:
+            log_event({"dir":"module","note":"entropy_error","error":str(e)})
+    if best is None:
+        ig = info_gain_scores(cands)
+        best = cands[max(range(len(cands)), key=ig.__getitem__)]  # ties: first candidate, as before
+    res = {"guess": best, "candidates": len(cands), "dict": len(dictionary)}
+    if probe and _wordle_probe_search:
+        try:
+            pr = await _wordle_probe_search(cands, dictionary, None, hit)  # type: ignore
+            if pr:
+                if pr["probe"]: res["guess"] = pr["guess"]
+                res["probe"] = pr
+        except Exception as e:
+            log_event({"dir":"module","note":"probe_error","error":str(e)})
+    return res
+
+def _apply_marks(sb: Dict, guess: str, pattern: str, hard: bool = False) -> Optional[str]:
+    """Structured marks → constraints via the parser module; returns an error string on bad input."""
+    if not _wordle_apply_marks:
+        return "marks not supported (no wordle parser module)"
+    try:
+        _wordle_apply_marks(sb, guess, pattern, hard=hard)  # type: ignore
+        return None
+    except ValueError as e:
+        return str(e)
+    except Exception as e:
+        log_event({"dir":"module","note":"marks_error","error":str(e)})
+        return f"{type(e).__name__}: {e}"
+
+def _constraints_frame(sb: Dict) -> str:
+    cons = sb["state"]["constraints"]
+    greens = "".join([c if c else "_" for c in cons["greens"]])
+    return json.dumps({
+        "type":"constraints",
+        "greens": greens,
+        "must_include": cons["must_include"],
+        "must_exclude": cons["must_exclude"]
+    })
+
+_POST_QUEUED: Dict[str, List[tuple]] = {}  # session -> turns waiting for their foundation pass
+
+def _submit_post(ws: WebSocket, session_id: str, exp_id: str, user_text: str, reply: str, probe: bool) -> None:
+    """Queue one turn's bookkeeping. Turns waiting on the same session ride in one job and are
+    replayed in order, so coalescing only merges the summary, never a turn's foundation pass."""
+    queued = _POST_QUEUED.setdefault(session_id, [])
+    queued.append((exp_id, user_text, reply))
+    JOBS.submit(f"post:{session_id}", _post_stream_job(ws, session_id, probe),
+                timeout_s=JOBS.timeout_s * len(queued))
+
+async def _foundation_pass(ws: WebSocket, session_id: str, exp_id: str, user_text: str, reply: str,
+                           probe: bool) -> None:
+    try:
+        fnd = await propose_and_apply_patch(user_text=user_text, assistant_reply=reply,
+                                            measure_fn=_measure_metrics, session_id=session_id)
+        if fnd.get("skipped"):
+            log_event({"dir":"foundation","skipped":fnd["skipped"],"project":fnd.get("project_id"),
+                       "exp_id":exp_id,"session_id":session_id})
+            return  # nothing was proposed, so no foundation frame either
+        log_event({"dir":"foundation","applied":fnd.get("applied"),"error":fnd.get("error"),
+                   "notes":fnd.get("notes"),"project":fnd.get("project_id"),
+                   "raw":(fnd.get("raw") or "")[:400],"exp_id":exp_id,"session_id":session_id})
+        # the patch may have moved the Wordle state: follow the frame with a refreshed suggestion
+        sug = None
+        if fnd.get("applied"):
+            sb = load_statebook(session_id) or {}
+            if sb.get("project", {}).get("id") == "wordle":
+                sug = await _validated_suggestion(sb, probe)
+        try:
+            await ws.send_text(json.dumps({"type":"foundation","applied":fnd.get("applied"),
+                                           "error":fnd.get("error"),"project":fnd.get("project_id"),
+                                           "exp_id":exp_id}))
+            if sug:
+                await ws.send_text(json.dumps({"type":"suggestion", **sug, "stage":"post", "exp_id":exp_id}))
+        except Exception:
+            pass  # socket closed meanwhile; the patch is saved regardless
+    except Exception as _e:
+        log_event({"dir":"foundation","error":f"[guard] {type(_e).__name__}: {_e}",
+                   "exp_id":exp_id,"session_id":session_id})
+
+def _post_stream_job(ws: WebSocket, session_id: str, probe: bool):
+    """Summary (once) + the foundation pass of every queued turn of the session, oldest first."""
+    async def run() -> None:
+        turns = _POST_QUEUED.pop(session_id, [])
+        if not turns: return
+        mem = SessionMemory(session_id)  # re-read: later turns may have saved since this one
+        await mem.maybe_summarize_async()  # saves under session_lock, merging turns added meanwhile
+        for exp_id, user_text, reply in turns:
+            await _foundation_pass(ws, session_id, exp_id, user_text, reply, probe)
+    return run
+
+_LEARN_QUEUED: Dict[str, Dict[str, bool]] = {}  # session -> {project: refresh} waiting for its learn job
+
+def _submit_learn(ws: WebSocket, session_id: str, projects: List[str], refresh: bool = False) -> None:
+    """Queue an autolearn batch; one still waiting for this session takes the new projects too,
+    so coalescing the job never drops a project (or a refresh asked for it)."""
+    queued = _LEARN_QUEUED.setdefault(session_id, {})
+    for p in projects: queued[p] = queued.get(p, False) or refresh
+    JOBS.submit(f"learn:{session_id}", _learn_job(ws, session_id), timeout_s=AUTOLEARN_TIMEOUT_S)
+
+def _learn_job(ws: WebSocket, session_id: str):
+    """Autolearn batch off the socket loop: learn_progress frames while it runs, one learn frame per project."""
+    async def run() -> None:
+        async def send(frame: Dict) -> None:
+            await ws.send_text(json.dumps(frame))
+        queued = _LEARN_QUEUED.pop(session_id, {})
+        if not queued: return
+        sb = load_statebook(session_id) or {}
+        refresh = [p for p, fresh in queued.items() if fresh]
+        for res in await run_autolearn_batch(list(queued), sb, on_progress=send, refresh=refresh):
+            log_event({"dir":"learn","project":res.get("project"),"applied":res.get("applied"),
+                       "cached":res.get("cached"),"error":res.get("error"),"session_id":session_id})
+            try: await send({"type":"learn", **res})
+            except Exception: pass
+    return run
+
+@app.get("/jobs")
+def jobs_status():
+    return JOBS.stats()
+
+@app.get("/llm/cache")
+def llm_cache_status():
+    return RESPONSES.stats()
+
+@app.get("/foundation/gate")
+def foundation_gate():
+    return _gate_stats() if _gate_stats else {"error": "no_foundation"}
 
 # ---------------- WebSocket ----------------
 PENDING: Dict[str, Dict[str, str]] = {}
@@ -310,6 +507,7 @@ async def ws_endpoint(ws: WebSocket):
     await ws.accept()
     await require_bearer(ws)
     await ws.send_text("ready")
+    stream_policy = FlushPolicy.from_params(ws.query_params)  # e.g. /ws?coalesce_ms=20&coalesce_chars=128
 
     try:
         while True:
@@ -333,44 +531,79 @@ async def ws_endpoint(ws: WebSocket):
                 await ws.send_text(json.dumps({"type":"ack","exp_id":exp_id}))
                 continue
 
+            # {"type":"stream_config","coalesce_ms":0} → this connection's frame coalescing (0 = frame per delta)
+            if mtype == "stream_config":
+                stream_policy = FlushPolicy.from_params(data, stream_policy)
+                await ws.send_text(json.dumps({"type":"stream_config", **stream_policy.as_dict()}))
+                continue
+
+            # {"type":"learn","projects":["wordle","chess"]} → background autolearn batch;
+            # "refresh": true (or "use_cache": false) regenerates instead of answering from the cache
+            session_id = str(data.get("session_id","default")).strip() or "default"
+            if mtype == "learn":
+                projects = [str(p).strip() for p in (data.get("projects") or []) if re.fullmatch(r"[\w-]+", str(p).strip())]
+                if not projects:
+                    await ws.send_text(json.dumps({"type":"error","error":"learn: no valid projects"}))
+                else:
+                    refresh = bool(data.get("refresh")) or data.get("use_cache") is False
+                    _submit_learn(ws, session_id, projects, refresh)
+                continue
+
+            # structured marks {"type":"marks","guess":"crane","pattern":"GYBBB"} → constraints, no NL parsing;
+            # "llm": false answers with the suggestion frame only
+            marks_turn = mtype == "marks"
+            if marks_turn:
+                guess   = str(data.get("guess","")).strip()
+                pattern = str(data.get("pattern","")).strip()
+                sb = load_statebook(session_id) or {"project": {}, "state": {}}
+                sb.setdefault("project", {})["id"] = "wordle"
+                _ensure_bootstrap(sb)
+                err = _apply_marks(sb, guess, pattern, bool(data.get("hard", _WORDLE_HARD)))
+                if err:
+                    await ws.send_text(json.dumps({"type":"error","error":err}))
+                    continue
+                save_statebook(sb, session_id)
+                await ws.send_text(_constraints_frame(sb))
+                sug = await _validated_suggestion(sb, bool(data.get("probe", _WORDLE_PROBE)))
+                if sug:
+                    sug["stage"] = "marks"
+                    await ws.send_text(json.dumps({"type":"suggestion", **sug}))
+                if data.get("llm", True) is False:
+                    continue
+                data["text"] = str(data.get("text") or f"{guess.lower()} {pattern.upper()}")
+
             # user message
             user_text  = str(data.get("text","")).strip()
-            session_id = str(data.get("session_id","default")).strip() or "default"
+            probe      = bool(data.get("probe", _WORDLE_PROBE))
             if not user_text:
                 await ws.send_text(json.dumps({"type":"error","error":"empty message"}))
                 continue
 
             # per-session memory
-            mem = SessionMemory(session_id)
-            mem.add_user(user_text); mem.save()
+            async with session_lock(session_id):
+                mem = SessionMemory(session_id)
+                mem.add_user(user_text); mem.save()
 
             # --- PRE-STREAM: activate Wordle if mentioned; parse NL → constraints; emit status ---
-            sb = load_statebook() or {"project": {}, "state": {}}
+            sb = load_statebook(session_id) or {"project": {}, "state": {}}
             if "wordle" in user_text.lower():
                 sb.setdefault("project", {})["id"] = "wordle"
                 _ensure_bootstrap(sb)
-                save_statebook(sb)
+                save_statebook(sb, session_id)
 
-            sb = load_statebook() or {}
+            sb = load_statebook(session_id) or {}
             if sb.get("project", {}).get("id") == "wordle":
-                _ensure_bootstrap(sb)
+                if _ensure_bootstrap(sb):
+                    save_statebook(sb, session_id)
 
                 # autolearn trigger (chat: "learn: wordle" or "learn wordle")
                 if _AUTOLEARN and re.search(r"\blearn\b.*\bwordle\b", user_text.lower()):
-                    res = await run_autolearn("wordle", sb)
-                    await ws.send_text(json.dumps({"type":"learn", **res}))
-
-                # parse NL → constraints
-                if _apply_from_nl(sb, user_text):
-                    save_statebook(sb)
-                    cons = sb["state"]["constraints"]
-                    greens = "".join([c if c else "_" for c in cons["greens"]])
-                    await ws.send_text(json.dumps({
-                        "type":"constraints",
-                        "greens": greens,
-                        "must_include": cons["must_include"],
-                        "must_exclude": cons["must_exclude"]
-                    }))
+                    _submit_learn(ws, session_id, ["wordle"])
+
+                # parse NL → constraints (a marks turn already applied them)
+                if not marks_turn and _apply_from_nl(sb, user_text):
+                    save_statebook(sb, session_id)
+                    await ws.send_text(_constraints_frame(sb))
 
                 # always emit a module status line (activation + dict size)
                 dlen = int(dict_len()) if _WORDLE_CHECKERS_OK else 0
@@ -382,7 +615,7 @@ async def ws_endpoint(ws: WebSocket):
                 }))
 
                 # pre-stream suggestion (server-validated)
-                pre = _validated_suggestion(sb)
+                pre = await _validated_suggestion(sb, probe) if not marks_turn else None
                 if pre:
                     pre["stage"] = "pre"
                     await ws.send_text(json.dumps({"type":"suggestion", **pre}))
@@ -407,50 +640,40 @@ async def ws_endpoint(ws: WebSocket):
             addon = addon_for(principle)
             if addon: sys_prompt += " " + addon
 
-            # build messages (durable + recent + compact module context)
-            messages = [{"role":"system","content":sys_prompt}]
-            messages += mem.context_messages()
-            messages += mem.recent_messages(max_turns=12, max_chars=5000)
-            if sb.get("project", {}).get("id") == "wordle":
-                block = _constraints_block(sb)
-                if block:
-                    messages.append({"role":"system","content": block})
-            messages.append({"role":"user","content": user_text})
+            # build messages (durable + recent + compact module context) within the model's token budget;
+            # trimming order: recent turns, then memory, then constraints — never system or the user turn
+            block = _constraints_block(sb) if sb.get("project", {}).get("id") == "wordle" else ""
+            messages, budget = assemble_chat(
+                system=[{"role":"system","content":sys_prompt}],
+                constraints=[{"role":"system","content": block}] if block else [],
+                memory=mem.context_messages(),
+                recent=mem.recent_messages(max_turns=12, max_chars=5000),
+                user={"role":"user","content": user_text},
+                model=OPENAI_MODEL,
+            )
+            log_event({"dir":"prompt","exp_id":exp_id,"session_id":session_id,**budget})
 
             # stream reply
-            chunks = []
+            chunks, frames = [], {}
             try:
-                async for chunk in stream_response(messages):
+                async for chunk in coalesce(stream_response(messages), stream_policy, frames):
                     chunks.append(chunk); await ws.send_text(chunk)
             except Exception as e:
                 err = f"[error] {type(e).__name__}: {e}"
                 await ws.send_text(err); log_event({"dir":"err","error":err,"exp_id":exp_id,"session_id":session_id})
             finally:
                 reply = "".join(chunks).strip()
-                mem.add_assistant(reply); await mem.maybe_summarize_async(); mem.save()
-
-                # foundation pass (generic)
-                try:
-                    fnd = await propose_and_apply_patch(user_text=user_text, assistant_reply=reply)
-                    log_event({"dir":"foundation","applied":fnd.get("applied"),"error":fnd.get("error"),
-                               "notes":fnd.get("notes"),"project":fnd.get("project_id"),
-                               "raw":(fnd.get("raw") or "")[:400],"exp_id":exp_id,"session_id":session_id})
-                    await ws.send_text(json.dumps({"type":"foundation","applied":fnd.get("applied"),
-                                                   "error":fnd.get("error"),"project":fnd.get("project_id")}))
-                except Exception as _e:
-                    log_event({"dir":"foundation","error":f"[guard] {type(_e).__name__}: {_e}",
-                               "exp_id":exp_id,"session_id":session_id})
-
-                # post-stream suggestion (server-validated)
-                if sb.get("project", {}).get("id") == "wordle":
-                    sug = _validated_suggestion(sb)
-                    if sug:
-                        sug["stage"] = "post"
-                        await ws.send_text(json.dumps({"type":"suggestion", **sug}))
-
-                log_event({"dir":"out","text":reply,"exp_id":exp_id,"session_id":session_id})
+                async with session_lock(session_id):  # re-read: a summary may have been saved mid-stream
+                    saved = SessionMemory(session_id)
+                    saved.add_assistant(reply); saved.save()
+
+                log_event({"dir":"out","text":reply,"exp_id":exp_id,"session_id":session_id,**frames})
                 await ws.send_text("--- end ---")
                 PENDING[exp_id] = {"bucket":bucket,"principle":principle}
 
+                # bookkeeping the user never sees runs after the reply; the foundation frame (and, when
+                # its patch applied, the post suggestion) follows later
+                _submit_post(ws, session_id, exp_id, user_text, reply, probe)
+
     except WebSocketDisconnect:
         return
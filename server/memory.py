@@ -1,10 +1,14 @@
 # MEMORY_V1B — per-session memory with fact extraction (name) + recent + summary
-import os, json, re
+# Writers of one session's file (the turn and the background summarizer) take session_lock(id) and
+# re-read before saving, so a summary finishing mid-turn never drops a turn or vice versa.
+import asyncio, os, json, re, weakref
 from pathlib import Path
 from typing import List, Dict
 from datetime import datetime, timezone
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
+
+from .llm_provider import get_client, complete, parses_as_json
+from .llm_cache import RESPONSES
 
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
@@ -23,6 +27,19 @@ NAME_PAT = re.compile(
     flags=re.IGNORECASE
 )
 
+_LOCKS: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+def session_lock(session_id: str) -> asyncio.Lock:
+    """The lock serializing read-modify-save of one session's memory file."""
+    sid = session_id or "default"
+    lock = _LOCKS.get(sid)
+    if lock is None:
+        lock = _LOCKS[sid] = asyncio.Lock()
+    return lock
+
+def _entry_key(r: Dict) -> tuple:
+    return (r.get("role"), r.get("ts"), r.get("text"))
+
 def _norm_name(s: str) -> str:
     s = s.strip().strip(".,;:!?)(")
     parts = re.split(r"([\-'])", s)
@@ -92,13 +109,29 @@ class SessionMemory:
         msgs.reverse()
         return msgs
 
+    def _merge_newer(self, seen: List[Dict]) -> None:
+        """Fold in what other writers saved since `seen` (our copy of recent) was read: turns
+        appended meanwhile go after ours, and facts are unioned."""
+        disk = SessionMemory(self.session_id).data
+        known = {_entry_key(r) for r in seen}
+        self.data["recent"] += [r for r in disk.get("recent", []) if _entry_key(r) not in known]
+        self.data["facts"] = sorted(set(self.data.get("facts", [])) | set(disk.get("facts", [])))
+
+    def _trim(self):
+        while self._recent_chars() > MAX_RECENT_CHARS and self.data["recent"]:
+            self.data["recent"].pop(0)
+
     async def maybe_summarize_async(self):
+        """Summarize when recent is over budget, then save; turns added while the LLM call runs
+        are merged back in under session_lock rather than overwritten."""
         if self._recent_chars() <= MAX_RECENT_CHARS:
             return
-        if not OPENAI_API_KEY:
-            while self._recent_chars() > MAX_RECENT_CHARS and self.data["recent"]:
-                self.data["recent"].pop(0)
-            self.save()
+        seen = list(self.data.get("recent", []))
+        client = get_client()
+        if client is None:
+            self._trim()
+            async with session_lock(self.session_id):
+                self._merge_newer(seen); self.save()
             return
 
         pre = []
@@ -106,7 +139,7 @@ class SessionMemory:
             pre.append("Prior facts: " + "; ".join(self.data["facts"]))
         if self.data.get("summary"):
             pre.append("Prior summary: " + self.data["summary"])
-        lines = [f"{r['role']}: {r['text']}" for r in self.data.get("recent", [])]
+        lines = [f"{r['role']}: {r['text']}" for r in seen]
         content = (
             (("\n".join(pre) + "\n") if pre else "") +
             "Conversation to compress:\n" + "\n".join(lines) +
@@ -114,16 +147,14 @@ class SessionMemory:
             "summary (<=150 words). No extra text."
         )
 
-        client = AsyncOpenAI(api_key=OPENAI_API_KEY)
         try:
-            resp = await client.chat.completions.create(
-                model=OPENAI_MODEL,
-                messages=[
+            out, _ = await complete(
+                [
                     {"role": "system", "content": "You condense chat into durable memory."},
                     {"role": "user", "content": content},
                 ],
+                model=OPENAI_MODEL, client=client, cache=RESPONSES, accept=parses_as_json,
             )
-            out = resp.choices[0].message.content.strip()
             obj = json.loads(out)
             if isinstance(obj.get("facts"), list):
                 exist = set(self.data.get("facts", []))
@@ -135,9 +166,9 @@ class SessionMemory:
                 self.data["summary"] = obj["summary"].strip()
             self.data["recent"] = self.data["recent"][-KEEP_TURNS:]
         except Exception:
-            while self._recent_chars() > MAX_RECENT_CHARS and self.data["recent"]:
-                self.data["recent"].pop(0)
-        self.save()
+            self._trim()
+        async with session_lock(self.session_id):
+            self._merge_newer(seen); self.save()
 
     @staticmethod
     def _now():
@@ -0,0 +1,91 @@
+# PROMPT_BUDGET_V1 — token-budgeted assembly of the chat-turn prompt.
+# Tokens are estimated offline (no tokenizer download): ~4 characters per token for words, one per
+# punctuation mark, plus the chat format's per-message overhead. Sections are filled by priority —
+# system and the current user message, then module constraints, then session memory (facts and
+# summary), then recent turns newest-first — and the lowest tier is trimmed first.
+import math, os, re
+from typing import Dict, List, Optional, Tuple
+
+MESSAGE_OVERHEAD = 4   # role/separator tokens per chat message
+REPLY_PRIMING    = 3   # tokens the API adds to prime the assistant reply
+
+# input budgets, well below each context window: they bound latency and cost, not correctness
+MODEL_BUDGETS = {"gpt-4o-mini": 6000, "gpt-4o": 6000, "gpt-4.1-mini": 6000, "gpt-4.1": 6000,
+                 "gpt-3.5-turbo": 3000}
+DEFAULT_BUDGET = 4000
+_BUDGET_ENV = os.getenv("PROMPT_BUDGET_TOKENS", "").strip()
+
+_PIECES = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+def estimate_tokens(text: str) -> int:
+    n = 0
+    for p in _PIECES.findall(text or ""):
+        n += math.ceil(len(p) / 4) if p[0].isalnum() else 1
+    return n
+
+def message_tokens(msg: Dict) -> int:
+    return MESSAGE_OVERHEAD + estimate_tokens(msg.get("content", ""))
+
+def budget_for(model: str) -> int:
+    if _BUDGET_ENV: return int(_BUDGET_ENV)
+    for name in sorted(MODEL_BUDGETS, key=len, reverse=True):  # "gpt-4o-mini-2024..." -> gpt-4o-mini
+        if model.startswith(name): return MODEL_BUDGETS[name]
+    return DEFAULT_BUDGET
+
+def truncate_to(text: str, max_tokens: int, marker: str = " …") -> str:
+    """Longest prefix of text (cut at a word boundary) within max_tokens, marked as cut."""
+    if estimate_tokens(text) <= max_tokens: return text
+    room = max_tokens - estimate_tokens(marker)
+    if room <= 0: return ""
+    out, used = [], 0
+    for word in re.findall(r"\S+\s*", text):
+        t = estimate_tokens(word)
+        if used + t > room: break
+        out.append(word); used += t
+    return "".join(out).rstrip() + marker if out else ""
+
+def _fit(msgs: List[Dict], left: int) -> Tuple[List[Dict], bool]:
+    """msgs, or their contents truncated (in order) to fit `left` tokens; True if anything was cut."""
+    out, cut = [], False
+    for m in msgs:
+        t = message_tokens(m)
+        if t <= left:
+            out.append(m); left -= t; continue
+        content = truncate_to(m.get("content", ""), left - MESSAGE_OVERHEAD)
+        cut = True
+        if content:
+            out.append({**m, "content": content}); left -= message_tokens(out[-1])
+    return out, cut
+
+def assemble_chat(system: List[Dict], constraints: List[Dict], memory: List[Dict], recent: List[Dict],
+                  user: Dict, model: str, budget: Optional[int] = None) -> Tuple[List[Dict], Dict]:
+    """Messages in prompt order (system, memory, recent, constraints, user) within the budget,
+    plus a report {budget, total, sections: {name: tokens}, dropped: {name: messages}, truncated}."""
+    budget = budget or budget_for(model)
+    left = budget - REPLY_PRIMING
+    kept, report = {}, {"budget": budget, "sections": {}, "dropped": {}, "truncated": []}
+
+    # tier 0: system + the user's message are always sent (truncated only if they alone overflow)
+    for name, msgs in (("user", [user]), ("system", system)):
+        kept[name], cut = _fit(msgs, left)
+        if cut: report["truncated"].append(name)
+        left -= sum(message_tokens(m) for m in kept[name])
+    for name, msgs in (("constraints", constraints), ("memory", memory)):
+        kept[name], cut = _fit(msgs, max(0, left))
+        if cut: report["truncated"].append(name)
+        left -= sum(message_tokens(m) for m in kept[name])
+    # recent turns: newest first, whole messages only; older ones are dropped
+    kept["recent"] = []
+    for m in reversed(recent):
+        t = message_tokens(m)
+        if t > left: break
+        kept["recent"].append(m); left -= t
+    kept["recent"].reverse()
+    if len(kept["recent"]) < len(recent):
+        report["dropped"]["recent"] = len(recent) - len(kept["recent"])
+
+    messages = kept["system"] + kept["memory"] + kept["recent"] + kept["constraints"] + kept["user"]
+    report["sections"] = {k: sum(message_tokens(m) for m in kept[k])
+                          for k in ("system", "constraints", "memory", "recent", "user")}
+    report["total"] = sum(report["sections"].values()) + REPLY_PRIMING
+    return messages, report
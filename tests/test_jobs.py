@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from server import jobs
+from server.jobs import JobQueue
+
+@pytest.fixture(autouse=True)
+def _no_history(monkeypatch):
+    logged = []
+    monkeypatch.setattr(jobs, "log_event", logged.append)
+    return logged
+
+def _run(coro):
+    return asyncio.run(coro)
+
+def test_jobs_run_and_are_counted():
+    async def main():
+        q, ran = JobQueue(workers=2, timeout_s=5), []
+        async def job(i):
+            ran.append(i)
+        for i in range(5):
+            q.submit(f"k{i}", lambda i=i: job(i))
+        await q.stop(drain_s=2)
+        return q, ran
+    q, ran = _run(main())
+    assert sorted(ran) == [0, 1, 2, 3, 4]
+    assert q.stats()["done"] == 5 and q.stats()["depth"] == 0
+
+def test_waiting_job_with_same_key_is_replaced():
+    async def main():
+        q, ran, gate = JobQueue(workers=1, timeout_s=5), [], asyncio.Event()
+        async def blocker():
+            await gate.wait()
+        async def job(tag):
+            ran.append(tag)
+        q.submit("busy", blocker)       # occupies the only worker
+        await asyncio.sleep(0)
+        assert q.submit("k", lambda: job("first")) is True
+        assert q.submit("k", lambda: job("second")) is False  # still waiting: coalesced
+        gate.set()
+        await q.stop(drain_s=2)
+        return q, ran
+    q, ran = _run(main())
+    assert ran == ["second"] and q.stats()["coalesced"] == 1
+
+def test_resubmit_while_active_runs_after_the_active_job():
+    async def main():
+        q, events, gate = JobQueue(workers=4, timeout_s=5), [], asyncio.Event()
+        async def first():
+            events.append("first:start"); await gate.wait(); events.append("first:end")
+        async def second():
+            events.append("second")
+        q.submit("k", first)
+        await asyncio.sleep(0.01)
+        q.submit("k", second)           # same key is running: must wait, not run alongside
+        await asyncio.sleep(0.05)
+        assert events == ["first:start"]
+        gate.set()
+        await q.stop(drain_s=2)
+        return events
+    assert _run(main()) == ["first:start", "first:end", "second"]
+
+def test_timeout_and_failure_are_counted_and_logged(_no_history):
+    async def main():
+        q = JobQueue(workers=1, timeout_s=5)
+        async def hang():
+            await asyncio.sleep(10)
+        async def boom():
+            raise ValueError("nope")
+        q.submit("slow", hang, timeout_s=0.05)
+        q.submit("bad", boom)
+        await q.stop(drain_s=2)
+        return q
+    q = _run(main())
+    assert q.stats()["timeouts"] == 1 and q.stats()["failed"] == 1 and q.stats()["done"] == 0
+    assert [e["key"] for e in _no_history] == ["slow", "bad"]
+    assert "timeout" in _no_history[0]["error"] and "ValueError" in _no_history[1]["error"]
+
+def test_worker_survives_a_timed_out_job():
+    async def main():
+        q, ran = JobQueue(workers=1, timeout_s=0.05), []
+        async def hang():
+            await asyncio.sleep(10)
+        async def ok():
+            ran.append(1)
+        q.submit("a", hang)
+        q.submit("b", ok)
+        await q.stop(drain_s=2)
+        return ran
+    assert _run(main()) == [1]
@@ -0,0 +1,184 @@
+import copy
+
+import pytest
+
+from server.foundation.patch_guard import (PatchError, PathPolicy, apply_patch, apply_with_evidence,
+                                           compile_path, compile_policy, readonly)
+
+def _sb():
+    return {"state": {"history": [{"guess": "crane"}], "constraints": {"greens": ["", "", "", "", ""]},
+                      "n": 1},
+            "kernel": {"policy": {"allowed_paths": ["/state/*"]}}}
+
+def test_compile_path_unescapes_and_skips_empty_segments():
+    assert compile_path("/a/b~1c/~0d") == ("a", "b/c", "~d")
+    assert compile_path("//a//") == ("a",)
+
+@pytest.mark.parametrize("path", [None, 3, ["state"], {"p": 1}])
+def test_compile_path_rejects_non_strings(path):
+    with pytest.raises(PatchError):
+        compile_path(path)
+
+def test_unhashable_path_in_op_is_patch_error():
+    with pytest.raises(PatchError):
+        apply_patch(_sb(), [{"op": "add", "path": ["state", "x"], "value": 1}])
+
+def test_add_replace_remove():
+    out = apply_patch(_sb(), [{"op": "add", "path": "/state/x", "value": 1},
+                              {"op": "replace", "path": "/state/n", "value": 2},
+                              {"op": "remove", "path": "/state/constraints"}])
+    assert out["state"]["x"] == 1 and out["state"]["n"] == 2 and "constraints" not in out["state"]
+
+def test_add_creates_missing_dict_levels():
+    out = apply_patch(_sb(), [{"op": "add", "path": "/state/a/b", "value": 1}])
+    assert out["state"]["a"] == {"b": 1}
+
+def test_list_append_insert_replace_remove():
+    out = apply_patch(_sb(), [{"op": "add", "path": "/state/history/-", "value": {"guess": "slate"}},
+                              {"op": "add", "path": "/state/history/0", "value": {"guess": "adieu"}},
+                              {"op": "replace", "path": "/state/constraints/greens/4", "value": "e"},
+                              {"op": "remove", "path": "/state/history/1"}])
+    assert [h["guess"] for h in out["state"]["history"]] == ["adieu", "slate"]
+    assert out["state"]["constraints"]["greens"] == ["", "", "", "", "e"]
+
+@pytest.mark.parametrize("op", [
+    {"op": "replace", "path": "/state/history/5", "value": 1},
+    {"op": "add", "path": "/state/history/x", "value": 1},
+    {"op": "remove", "path": "/state/missing"},
+    {"op": "remove", "path": "/state/history/1"},
+])
+def test_bad_list_index_or_missing_path(op):
+    with pytest.raises(PatchError):
+        apply_patch(_sb(), [op])
+
+def test_root_cannot_be_replaced_or_removed():
+    for op in ({"op": "replace", "path": "/", "value": {}}, {"op": "remove", "path": ""}):
+        with pytest.raises(PatchError):
+            apply_patch(_sb(), [op])
+
+def test_copy_and_move():
+    out = apply_patch(_sb(), [{"op": "copy", "from": "/state/history/0", "path": "/state/last"},
+                              {"op": "move", "from": "/state/n", "path": "/state/count"}])
+    assert out["state"]["last"] == {"guess": "crane"}
+    assert out["state"]["last"] is not out["state"]["history"][0]  # a copy, not an alias
+    assert out["state"]["count"] == 1 and "n" not in out["state"]
+
+def test_move_into_own_child_is_rejected():
+    with pytest.raises(PatchError):
+        apply_patch(_sb(), [{"op": "move", "from": "/state", "path": "/state/inner"}])
+
+@pytest.mark.parametrize("act", ["copy", "move"])
+def test_copy_move_without_from(act):
+    with pytest.raises(PatchError):
+        apply_patch(_sb(), [{"op": act, "path": "/state/x"}])
+
+def test_test_op():
+    out = apply_patch(_sb(), [{"op": "test", "path": "/state/n", "value": 1},
+                              {"op": "replace", "path": "/state/n", "value": 2}])
+    assert out["state"]["n"] == 2
+    with pytest.raises(PatchError):
+        apply_patch(_sb(), [{"op": "test", "path": "/state/n", "value": 9}])
+
+@pytest.mark.parametrize("op", [{"op": "frobnicate", "path": "/state/n"}, "not-an-op"])
+def test_unsupported_or_malformed_op(op):
+    with pytest.raises(PatchError):
+        apply_patch(_sb(), [op])
+
+def test_failed_patch_leaves_original_untouched():
+    sb = _sb(); before = copy.deepcopy(sb)
+    with pytest.raises(PatchError):
+        apply_patch(sb, [{"op": "add", "path": "/state/history/-", "value": {"guess": "slate"}},
+                         {"op": "replace", "path": "/state/constraints/greens/0", "value": "s"},
+                         {"op": "remove", "path": "/state/n"},
+                         {"op": "test", "path": "/state/n", "value": 1}])  # fails after three writes
+    assert sb == before
+
+def test_success_shares_untouched_subtrees_and_never_mutates_input():
+    sb = _sb(); before = copy.deepcopy(sb)
+    out = apply_patch(sb, [{"op": "add", "path": "/state/history/-", "value": {"guess": "slate"}}])
+    assert sb == before
+    assert out["kernel"] is sb["kernel"]                              # untouched: shared
+    assert out["state"]["constraints"] is sb["state"]["constraints"]
+    assert out["state"] is not sb["state"]                            # on the written path: copied
+    assert out["state"]["history"] is not sb["state"]["history"]
+    assert out["state"]["history"][0] is sb["state"]["history"][0]
+
+def test_readonly_view_reads_but_cannot_write():
+    view = readonly(_sb())
+    assert view["state"]["history"][0]["guess"] == "crane"
+    assert len(view["state"]["constraints"]["greens"]) == 5
+    with pytest.raises(TypeError):
+        view["state"]["n"] = 2
+    with pytest.raises(AttributeError):
+        view["state"]["history"].append(1)
+
+_POLICY = {"allowed_paths": ["/state/*"], "proof_required": [{"path": "/state/constraints/-"}]}
+
+def _measure(sb):
+    return {"greens": sum(1 for c in sb["state"]["constraints"]["greens"] if c)}
+
+def test_apply_with_evidence_checks_paths_and_evidence():
+    sb = _sb()
+    with pytest.raises(PatchError, match="not allowed"):
+        apply_with_evidence(sb, {"patch": [{"op": "replace", "path": "/kernel/policy", "value": {}}]},
+                            _POLICY, _measure)
+    risky = [{"op": "replace", "path": "/state/constraints/greens/0", "value": "c"}]
+    with pytest.raises(PatchError, match="Evidence required"):
+        apply_with_evidence(sb, {"patch": risky}, _POLICY, _measure)
+    with pytest.raises(PatchError, match="Evidence mismatch"):
+        apply_with_evidence(sb, {"patch": risky, "evidence": {"checker_deltas": {"greens": -1}}},
+                            _POLICY, _measure)
+    out, notes = apply_with_evidence(sb, {"patch": risky, "evidence": {"checker_deltas": {"greens": 1}}},
+                                     _POLICY, _measure)
+    assert out["state"]["constraints"]["greens"][0] == "c" and notes == ["Evidence verified"]
+    assert sb == _sb()
+
+# ---------------- path policy trie vs the original string matchers ----------------
+def _allowed_ref(path, patterns):
+    for pat in patterns:
+        if pat.endswith("/*"):
+            if path.startswith(pat[:-1]): return True
+        elif path == pat: return True
+    return False
+
+def _risky_ref(path, targets):
+    for rt in targets:
+        if rt.endswith("/*"):
+            if path.startswith(rt[:-1]): return True
+        elif rt.endswith("/-"):
+            if path.startswith(rt[:-2]): return True
+        elif path == rt: return True
+    return False
+
+_ALLOWED = ["/state/*", "/temp/*", "/project/goal", "/logs/decisions/*"]
+_RISKY = ["/state/constraints/-", "/state/history/*", "/project/goal"]
+# segment names are never prefixes of one another, so the old startswith() matching and the
+# token trie must agree everywhere
+_PATHS = ["/state", "/state/x", "/state/x/y", "/state/constraints", "/state/constraints/greens/0",
+          "/state/history", "/state/history/-", "/state/history/3/guess", "/temp/a", "/project",
+          "/project/goal", "/project/goal/sub", "/project/id", "/logs/decisions/1", "/logs", "/kernel/policy",
+          "/gaps/q"]
+
+def test_policy_trie_matches_reference():
+    pol = PathPolicy(tuple(_ALLOWED), tuple(_RISKY))
+    for path in _PATHS:
+        assert pol.check(compile_path(path)) == (_allowed_ref(path, _ALLOWED), _risky_ref(path, _RISKY)), path
+
+def test_check_patch_reports_denied_paths_and_proof_indexes():
+    pol = compile_policy({"allowed_paths": _ALLOWED, "proof_required": [{"path": p} for p in _RISKY]})
+    denied, proof = pol.check_patch([
+        {"op": "replace", "path": "/state/x", "value": 1},
+        {"op": "replace", "path": "/kernel/policy", "value": {}},             # denied
+        {"op": "add", "path": "/state/history/-", "value": {}},               # needs evidence
+        {"op": "move", "from": "/kernel/x", "path": "/state/y"},              # from is denied too
+        {"op": "test", "path": "/kernel/policy", "value": {}},                # read-only: skipped
+        {"op": "add", "path": ["not", "a", "string"], "value": 1},           # denied, no error
+    ])
+    assert denied == [(1, "/kernel/policy"), (3, "/kernel/x"), (5, "['not', 'a', 'string']")]
+    assert proof == [2]
+
+def test_compile_policy_recompiles_after_policy_edit():
+    policy = {"allowed_paths": ["/state/*"]}
+    assert not compile_policy(policy).check(compile_path("/temp/a"))[0]
+    policy["allowed_paths"].append("/temp/*")
+    assert compile_policy(policy).check(compile_path("/temp/a"))[0]
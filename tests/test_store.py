@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+import time
+
+from server.foundation import store
+from server.foundation.store import ShardedStatebooks, StatebookStore, atomic_write, shard_name
+
+def _read(path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+def test_save_is_written_behind_by_the_timer(tmp_path):
+    st = StatebookStore(tmp_path / "sb.json", lambda: {"state": {}}, flush_s=0.05)
+    doc = st.load(); doc["state"]["n"] = 1; st.save(doc)
+    assert st.dirty and not st.path.exists()
+    time.sleep(0.3)
+    assert _read(st.path) == {"state": {"n": 1}} and not st.dirty
+
+def test_concurrent_flushes_leave_a_whole_file(tmp_path):
+    st = StatebookStore(tmp_path / "sb.json", lambda: {"state": {}}, flush_s=0)
+    doc = st.load()
+    for i in range(50):
+        doc["state"]["n"] = i; doc["state"]["pad"] = "x" * 1000 * (i % 7)
+        with st._lock: st._dirty = True
+        threads = [threading.Thread(target=st.flush) for _ in range(4)]
+        for t in threads: t.start()
+        st.close()
+        for t in threads: t.join()
+        assert _read(st.path)["state"]["n"] == i
+
+def test_stale_tmp_from_a_crash_does_not_replace_the_live_file(tmp_path):
+    path = tmp_path / "sb.json"
+    atomic_write(path, json.dumps({"state": {"live": True}}))
+    for pid in (os.getpid(), 999999):  # this process's temp name and another (dead) writer's
+        (tmp_path / f".sb.json.{pid}.tmp").write_text('{"state": {"torn"', encoding="utf-8")
+    st = StatebookStore(path, lambda: {"state": {}}, flush_s=0)
+    assert st.load() == {"state": {"live": True}}
+    doc = st.load(); doc["state"]["n"] = 2; st.save(doc)
+    assert _read(path) == {"state": {"live": True, "n": 2}}
+    assert not (tmp_path / f".sb.json.{os.getpid()}.tmp").exists()  # ours was replaced by the rename
+
+def test_unsaved_change_is_written_on_close(tmp_path, caplog):
+    st = StatebookStore(tmp_path / "sb.json", lambda: {"state": {}}, flush_s=60)
+    st.load()["state"]["silent"] = True  # mutated without save()
+    st.close()
+    assert _read(st.path) == {"state": {"silent": True}}
+    assert "without save()" in caplog.text
+
+def test_untouched_default_is_not_written(tmp_path):
+    st = StatebookStore(tmp_path / "sb.json", lambda: {"state": {}}, flush_s=0)
+    st.load(); st.close()
+    assert not st.path.exists()
+
+# ---------------- per-session shards ----------------
+def _shards(tmp_path, **kw):
+    return ShardedStatebooks(tmp_path / "shards", tmp_path / "default.json",
+                             lambda base: {"state": {}, "seeded_from_default": base is not None}, **kw)
+
+def _drain_flusher():
+    store._FLUSHER.submit(lambda: None).result(timeout=5)  # single thread: runs after queued evictions
+
+def test_eviction_flushes_dirty_shards(tmp_path):
+    sh = _shards(tmp_path, max_resident=2, flush_s=60)  # the timer never fires within the test
+    for sid in ("a", "b", "c", "d"):
+        doc = sh.load(sid); doc["state"]["sid"] = sid; sh.save(doc, sid)
+    assert sh.resident() == 2  # the default statebook (seed of new shards) takes an LRU slot too
+    _drain_flusher()
+    evicted = [sid for sid in "abcd" if shard_name(sid) not in sh._stores]
+    assert len(evicted) >= 2
+    for sid in "abcd":  # evicted shards are on disk; resident ones wait for their timer
+        assert sh.path_for(sid).exists() == (sid in evicted)
+    for sid in evicted:
+        assert _read(sh.path_for(sid))["state"]["sid"] == sid
+    sh.close()
+    for sid in "abcd":
+        assert _read(sh.path_for(sid))["state"]["sid"] == sid
+
+def test_evicted_shard_reloads_its_latest_state(tmp_path):
+    sh = _shards(tmp_path, max_resident=1, flush_s=60)
+    a = sh.load("a"); a["state"]["n"] = 1; sh.save(a, "a")
+    sh.load("b")                      # evicts a; its flush may still be queued
+    assert sh.load("a")["state"]["n"] == 1
+    _drain_flusher()
+    assert _shards(tmp_path).load("a")["state"]["n"] == 1  # and a cold reader sees it on disk
+
+def test_new_session_is_seeded_from_the_default_statebook(tmp_path):
+    sh = _shards(tmp_path)
+    assert sh.load("default") == {"state": {}, "seeded_from_default": False}
+    assert sh.load("s1")["seeded_from_default"] is True
+    assert sh.path_for("default") == tmp_path / "default.json"
+    assert sh.path_for("") == sh.path_for(None) == tmp_path / "default.json"
+
+def test_shard_names_are_safe_and_do_not_collide():
+    ids = ["a b", "a_b", "a/b", "a\\b", "../x", "x" * 200, "x" * 201, "é", "e"]
+    names = [shard_name(i) for i in ids]
+    assert len(set(names)) == len(ids)
+    for n in names:
+        assert all(c.isalnum() or c in "_-" for c in n) and len(n) <= 59
+    assert shard_name("a b") == shard_name("a b")  # stable across calls
+
+def test_legacy_shard_file_is_adopted(tmp_path):
+    (tmp_path / "shards").mkdir()
+    (tmp_path / "shards" / "s1.json").write_text('{"state": {"old": 1}}', encoding="utf-8")
+    sh = _shards(tmp_path)
+    assert sh.load("s1") == {"state": {"old": 1}}
+    assert sh.path_for("s1").exists() and not (tmp_path / "shards" / "s1.json").exists()
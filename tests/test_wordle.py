@@ -0,0 +1,188 @@
+import random
+
+import pytest
+
+from server.foundation.modules.wordle import lexicon, patterns, simulate
+from server.foundation.modules.wordle.checker import get_dict, respects_constraints, valid_word
+from server.foundation.modules.wordle.index import WordIndex
+from server.foundation.modules.wordle.parser import apply_marks
+from server.foundation.modules.wordle.predicate import compile_constraints
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+def _score(guess, answer):
+    """Reference Wordle marks as a G/Y/B string: greens first, then yellows left to right."""
+    marks, left = ["B"] * 5, list(answer)
+    for i in range(5):
+        if guess[i] == answer[i]:
+            marks[i] = "G"; left.remove(guess[i])
+    for i in range(5):
+        if marks[i] == "B" and guess[i] in left:
+            marks[i] = "Y"; left.remove(guess[i])
+    return "".join(marks)
+
+def _game(guesses):
+    sb = {"project": {"id": "wordle"}, "state": {}}
+    for guess, marks in guesses:
+        apply_marks(sb, guess, marks)
+    return sb["state"]["constraints"]
+
+def _random_constraints(rng):
+    """Arbitrary (often contradictory) constraints, beyond what a real game produces."""
+    pick = lambda k: rng.sample(LETTERS[:12], k)
+    return {"greens": [rng.choice(LETTERS[:12]) if rng.random() < 0.2 else "" for _ in range(5)],
+            "yellows_not_here": [pick(rng.randint(0, 2)) for _ in range(5)],
+            "must_include": pick(rng.randint(0, 2)),
+            "must_exclude": pick(rng.randint(0, 3)),
+            "min_counts": {c: rng.randint(1, 2) for c in pick(rng.randint(0, 2))},
+            "max_counts": {c: rng.randint(0, 2) for c in pick(rng.randint(0, 2))}}
+
+def _game_constraints(rng, words):
+    answer = rng.choice(words)
+    guesses = [rng.choice(words) for _ in range(rng.randint(1, 3))]
+    return answer, _game([(g, _score(g, answer)) for g in guesses])
+
+@pytest.fixture(scope="module")
+def words():
+    return list(get_dict())
+
+# ---------------- mapped dictionary snapshot ----------------
+def test_snapshot_reads_words_and_membership_from_the_mapping(tmp_path, words):
+    src = tmp_path / "dictionary.txt"
+    src.write_text("\n".join(["Zesty", "crane", "no", "abbey", "crane!"] + words[:500]), encoding="utf-8")
+    lex = lexicon.load(src)
+    assert lex._mm is not None and lexicon.snapshot_path(src).exists()
+    expect = ["zesty", "crane", "abbey"] + words[:500]
+    assert list(lex) == expect and len(lex) == len(expect) and lex == expect
+    assert lex[0] == "zesty" and lex[-1] == expect[-1] and lex[1:3] == ["crane", "abbey"]
+    with pytest.raises(IndexError):
+        lex[len(expect)]
+    for w in set(expect) | {"aaaaa", "zzzzz", "crane!", "Zesty", "no", "", None, 5, "ébahi"}:
+        assert (w in lex) == (w in set(expect)), w
+    assert bytes(lex.packed) == "".join(expect).encode("ascii")
+    assert lexicon.Lexicon(expect) == lex and lexicon.Lexicon(expect).digest == lex.digest
+
+# ---------------- bitset index vs the per-word scan ----------------
+def test_index_filter_matches_naive_scan_on_games(words):
+    rng, index = random.Random(1), WordIndex(words)
+    for _ in range(40):
+        answer, cons = _game_constraints(rng, words)
+        got = index.filter(cons)
+        assert got == [w for w in words if respects_constraints(w, cons)]
+        assert answer in got and index.count(cons) == len(got)
+
+def test_index_filter_matches_naive_scan_on_random_constraints():
+    rng = random.Random(2)
+    words = ["".join(rng.choice(LETTERS[:12]) for _ in range(5)) for _ in range(1500)]
+    index = WordIndex(words)
+    for _ in range(150):
+        cons = _random_constraints(rng)
+        assert index.filter(cons) == [w for w in words if respects_constraints(w, cons)], cons
+
+# ---------------- feedback codes vs the reference scorer ----------------
+def _code(marks):
+    return sum({"B": 0, "Y": 1, "G": 2}[m] * 3**i for i, m in enumerate(marks))
+
+# repeated letters in the guess, the answer, or both
+_DUPES = [("speed", "abide", "BBYBY"), ("eerie", "there", "YBYBG"), ("eerie", "agree", "YBGBG"),
+          ("llama", "hello", "YYBBB"), ("abbey", "babes", "YYGGB"), ("geese", "those", "BBBGG"),
+          ("sassy", "essay", "YYGBG"), ("apple", "paper", "YYGBY")]
+
+@pytest.mark.parametrize("guess,answer,marks", _DUPES)
+def test_reference_scorer_on_repeated_letters(guess, answer, marks):
+    assert _score(guess, answer) == marks
+    assert patterns.feedback(guess, answer) == _code(marks)
+
+def test_feedback_matches_reference_on_random_pairs(words):
+    rng = random.Random(3)
+    for _ in range(3000):
+        g, a = rng.choice(words), rng.choice(words)
+        assert patterns.feedback(g, a) == _code(_score(g, a)), (g, a)
+
+def test_matrix_codes_match_reference():
+    pytest.importorskip("numpy")
+    rng = random.Random(4)
+    words = sorted({w for pair in _DUPES for w in pair[:2]} |
+                   {"".join(rng.choice("aeelrst") for _ in range(5)) for _ in range(150)})
+    m = patterns.build_matrix(words)
+    for i, g in enumerate(words):
+        for j, a in enumerate(words):
+            assert m[i, j] == _code(_score(g, a)), (g, a)
+
+def test_build_and_save_keeps_other_word_lists(tmp_path):
+    pytest.importorskip("numpy")
+    first = patterns.build_and_save(["crane", "slate"], tmp_path)
+    second = patterns.build_and_save(["crane", "trace", "eerie"], tmp_path)
+    again = patterns.build_and_save(["crane", "slate"], tmp_path)
+    assert first == again and first != second
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([first.name, second.name])
+
+# ---------------- apply_marks: repeated letters ----------------
+def test_apply_marks_gray_copy_caps_a_repeated_letter():
+    cons = _game([("speed", "BBYBY")])  # answer abide: one e, one d, no s/p
+    assert cons["min_counts"] == {"e": 1, "d": 1}
+    assert cons["max_counts"] == {"e": 1}
+    assert sorted(cons["must_exclude"]) == ["p", "s"] and "e" not in cons["must_exclude"]
+    assert "e" in cons["yellows_not_here"][2] and "e" in cons["yellows_not_here"][3]
+
+def test_apply_marks_green_and_yellow_copies_raise_the_minimum():
+    cons = _game([("eerie", "YBYBG")])  # answer there: exactly two e
+    assert cons["greens"][4] == "e"
+    assert cons["min_counts"]["e"] == 2 and cons["max_counts"]["e"] == 2
+    assert cons["min_counts"]["r"] == 1 and "r" not in cons["max_counts"]
+    assert cons["must_exclude"] == ["i"]
+
+def test_apply_marks_without_gray_sets_no_cap_until_one_appears():
+    assert _score("elder", "there") == "YBBYY" and _score("geese", "there") == "BBGBG"
+    cons = _game([("elder", "YBBYY")])  # both e marked: at least two, no upper bound yet
+    assert cons["min_counts"]["e"] == 2 and "e" not in cons["max_counts"]
+    cons = _game([("elder", "YBBYY"), ("geese", "BBGBG")])  # a gray third e caps it at two
+    assert cons["min_counts"]["e"] == 2 and cons["max_counts"]["e"] == 2
+
+def _counts_consistent(word, guess, marks):
+    for ch in set(guess):
+        hits = sum(1 for c, m in zip(guess, marks) if c == ch and m != "B")
+        gray = any(c == ch and m == "B" for c, m in zip(guess, marks))
+        if (word.count(ch) != hits) if gray else (word.count(ch) < hits): return False
+    return True
+
+def test_apply_marks_keeps_exactly_the_count_consistent_words(words):
+    rng, index = random.Random(5), WordIndex(words)
+    for _ in range(40):
+        answer = rng.choice(words)
+        played = [(g, _score(g, answer)) for g in (rng.choice(words) for _ in range(rng.randint(1, 3)))]
+        survivors = set(index.filter(_game(played)))
+        consistent = {w for w in words if all(_score(g, w) == m for g, m in played)}
+        assert answer in survivors and consistent <= survivors  # nothing consistent is ruled out
+        for w in survivors:  # and every count the marks imply is enforced
+            assert all(_counts_consistent(w, g, m) for g, m in played), (w, played)
+
+# ---------------- compiled predicate and hard mode ----------------
+def test_compiled_predicate_matches_respects_constraints():
+    rng = random.Random(6)
+    words = ["".join(rng.choice(LETTERS[:12]) for _ in range(5)) for _ in range(400)]
+    for _ in range(400):
+        cons = _random_constraints(rng)
+        if rng.random() < 0.3:  # the reference lowercases marks; so must the compiled form
+            cons["must_include"] = [c.upper() for c in cons["must_include"]]
+            cons["yellows_not_here"] = [[c.upper() for c in y] for y in cons["yellows_not_here"]]
+        pred = compile_constraints(cons)
+        for w in words:
+            assert pred(w) == respects_constraints(w, cons), (w, cons)
+
+def test_hard_mode_rejects_guesses_that_ignore_earlier_marks():
+    sb = {"project": {"id": "wordle"}, "state": {}}
+    apply_marks(sb, "crane", "BBYBB", hard=True)
+    cons = sb["state"]["constraints"]
+    assert valid_word("tails", constraints=cons) and not valid_word("crane", constraints=cons)
+    with pytest.raises(ValueError, match="hard mode"):
+        apply_marks(sb, "crane", "BBYBB", hard=True)
+    with pytest.raises(ValueError, match="hard mode"):
+        apply_marks(sb, "zzzzz", "BBBBB", hard=True)  # not a word at all
+    assert [h["guess"] for h in sb["state"]["history"]] == ["crane"]  # rejected guesses are not recorded
+    apply_marks(sb, "tails", "BGBBB", hard=True)
+
+def test_info_gain_ties_keep_the_first_candidate(monkeypatch):
+    monkeypatch.setattr(simulate, "candidates_for", lambda sb: ["slate", "crane", "trace"])
+    monkeypatch.setattr(simulate, "info_gain_scores", lambda cands: [1.0, 2.0, 2.0])
+    assert simulate._by_info_gain({}) == "crane"  # not the lexicographically largest, "trace"